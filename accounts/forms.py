@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from .models import User
 from jobs.models import JobSeeker
+from jobs.validators import validate_resume
 
 class JobSeekerRegistrationForm(UserCreationForm):
     """Job Seeker Registration Form"""
@@ -50,3 +51,9 @@ class JobSeekerProfileForm(forms.ModelForm):
             'experience': forms.Textarea(attrs={'rows': 4}),
             'date_of_birth': forms.DateInput(attrs={'type': 'date'}),
         }
+    
+    def clean_resume(self):
+        resume = self.cleaned_data.get('resume')
+        if resume:
+            validate_resume(resume)
+        return resume
@@ -6,6 +6,7 @@ from django.conf import settings
 from django.db.models import Q
 from companies.models import Company, Job
 from jobs.models import Application, JobSeeker
+from jobs.search import company_search
 from accounts.models import User
 from accounts.decorators import user_type_required
 from notifications.models import Notification
@@ -52,10 +53,7 @@ def company_list(request):
     # Search
     search = request.GET.get('search')
     if search:
-        companies = companies.filter(
-            Q(company_name__icontains=search) |
-            Q(email__icontains=search)
-        )
+        companies = company_search(companies, search)
     
     return render(request, 'admin/company_list.html', {'companies': companies})
 
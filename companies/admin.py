@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import Company, Job
 
 @admin.register(Company)
@@ -8,8 +9,18 @@ class CompanyAdmin(admin.ModelAdmin):
     search_fields = ['company_name', 'email', 'registration_number']
     actions = ['approve_companies', 'reject_companies']
     
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'status' in form.changed_data:
+            obj.jobs.refresh_listed()
+    
     def approve_companies(self, request, queryset):
-        queryset.update(status='approved')
+        # The queryset keeps the changelist filters (e.g. status=pending),
+        # so it no longer matches the companies once they are approved
+        ids = list(queryset.values_list('pk', flat=True))
+        now = timezone.now()
+        Company.objects.filter(pk__in=ids).update(status='approved', approved_date=now, updated_at=now)
+        Job.objects.filter(company_id__in=ids).refresh_listed()
     approve_companies.short_description = "Approve selected companies"
 
 @admin.register(Job)
@@ -0,0 +1,19 @@
+# companies/management/commands/rebuild_company_stats.py
+"""
+Management command to recount the company dashboard counters from scratch.
+Run: python manage.py rebuild_company_stats [--company ID ...]
+"""
+
+from django.core.management.base import BaseCommand
+from companies.models import CompanyStats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes CompanyStats from jobs and applications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, nargs='+', help='Only these company ids')
+
+    def handle(self, *args, **options):
+        count = CompanyStats.recompute(options['company'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Recounted stats of {count} company(ies)'))
@@ -0,0 +1,27 @@
+# companies/management/commands/unlist_expired_jobs.py
+"""
+Management command to drop jobs past their deadline from public listings.
+Schedule it daily (e.g. cron): python manage.py unlist_expired_jobs
+"""
+
+from django.core.management.base import BaseCommand
+from companies.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Unlists jobs whose application deadline has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute is_listed for every job instead of only expired ones',
+        )
+
+    def handle(self, *args, **options):
+        if options['full']:
+            updated = Job.objects.refresh_listed()
+            self.stdout.write(self.style.SUCCESS(f'✓ Recomputed listing flag for {updated} jobs'))
+        else:
+            updated = Job.objects.unlist_expired()
+            self.stdout.write(self.style.SUCCESS(f'✓ Unlisted {updated} expired jobs'))
@@ -0,0 +1,74 @@
+# Generated by Django 4.2 on 2026-10-18 16:53
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_is_listed(apps, schema_editor):
+    Company = apps.get_model('companies', 'Company')
+    Job = apps.get_model('companies', 'Job')
+    approved = models.Exists(
+        Company.objects.filter(pk=models.OuterRef('company_id'), status='approved')
+    )
+    listed = (
+        models.Q(is_active=True) &
+        (models.Q(deadline__isnull=True) | models.Q(deadline__gte=timezone.localdate())) &
+        models.Q(approved)
+    )
+    Job.objects.update(is_listed=models.ExpressionWrapper(listed, output_field=models.BooleanField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_listing_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='job',
+            name='jobs_active_newest_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='jobs_active_salary_high_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='jobs_active_salary_low_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='jobs_active_most_viewed_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='jobs_active_deadline_idx',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='is_listed',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(populate_is_listed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_listed', True)), fields=['-posted_date', '-id'], name='jobs_listed_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(models.OrderBy(models.F('salary_max'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), condition=models.Q(('is_listed', True)), name='jobs_listed_salary_high_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_listed', True)), fields=['salary_min', 'id'], name='jobs_listed_salary_low_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_listed', True)), fields=['-views_count', '-id'], name='jobs_listed_most_viewed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_listed', True)), fields=['deadline', 'id'], name='jobs_listed_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-18 16:59
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_updated_at(apps, schema_editor):
+    Company = apps.get_model('companies', 'Company')
+    Job = apps.get_model('companies', 'Job')
+    Company.objects.update(updated_at=Coalesce('approved_date', 'submitted_date'))
+    Job.objects.update(updated_at=models.F('posted_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0005_job_is_listed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2 on 2026-10-18 17:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+STATUSES = ('submitted', 'under_review', 'shortlisted', 'interview_scheduled', 'accepted', 'rejected')
+
+
+def backfill_company_stats(apps, schema_editor):
+    Company = apps.get_model('companies', 'Company')
+    CompanyStats = apps.get_model('companies', 'CompanyStats')
+    Job = apps.get_model('companies', 'Job')
+    Application = apps.get_model('jobs', 'Application')
+    rows = {pk: CompanyStats(company_id=pk) for pk in Company.objects.values_list('pk', flat=True)}
+    jobs = Job.objects.order_by().values('company_id').annotate(
+        total=models.Count('pk'),
+        active=models.Count('pk', filter=models.Q(is_active=True)),
+        views=models.Sum('views_count'),
+    )
+    for row in jobs:
+        stats = rows[row['company_id']]
+        stats.total_jobs, stats.active_jobs, stats.total_views = row['total'], row['active'], row['views'] or 0
+    applications = Application.objects.order_by().values('job__company_id').annotate(
+        total=models.Count('pk'),
+        **{status: models.Count('pk', filter=models.Q(status=status)) for status in STATUSES},
+    )
+    for row in applications:
+        stats = rows[row['job__company_id']]
+        stats.total_applications = row['total']
+        for status in STATUSES:
+            setattr(stats, f'applications_{status}', row[status])
+    CompanyStats.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_updated_at'),
+        ('jobs', '0007_application_status_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyStats',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='companies.company')),
+                ('total_jobs', models.PositiveIntegerField(default=0)),
+                ('active_jobs', models.PositiveIntegerField(default=0)),
+                ('total_applications', models.IntegerField(default=0)),
+                ('applications_submitted', models.IntegerField(default=0)),
+                ('applications_under_review', models.IntegerField(default=0)),
+                ('applications_shortlisted', models.IntegerField(default=0)),
+                ('applications_interview_scheduled', models.IntegerField(default=0)),
+                ('applications_accepted', models.IntegerField(default=0)),
+                ('applications_rejected', models.IntegerField(default=0)),
+                ('total_views', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Company stats',
+                'db_table': 'company_stats',
+            },
+        ),
+        migrations.RunPython(backfill_company_stats, migrations.RunPython.noop),
+    ]
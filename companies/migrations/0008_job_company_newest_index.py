@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_company_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['company', '-posted_date', '-id'], name='jobs_company_newest_idx'),
+        ),
+    ]
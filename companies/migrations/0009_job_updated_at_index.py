@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0008_job_company_newest_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['updated_at'], name='jobs_updated_at_idx'),
+        ),
+    ]
@@ -1,6 +1,23 @@
-from django.db import models
+from django.apps import apps
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connection, models
+from django.db.models.functions import Coalesce, Now
 from django.utils import timezone
 from accounts.models import User
+from jobs.search_cache import bump_generation
+
+# Text search configuration used for Job.search_vector and keyword queries
+SEARCH_CONFIG = 'english'
+
+
+def job_search_vector():
+    """Weighted tsvector expression for a job: title > category > description"""
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+        SearchVector('category', weight='B', config=SEARCH_CONFIG) +
+        SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
 
 class Company(models.Model):
     """Company Model for employer registration"""
@@ -25,10 +42,17 @@ class Company(models.Model):
     submitted_date = models.DateTimeField(auto_now_add=True)
     approved_date = models.DateTimeField(null=True, blank=True)
     rejection_reason = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'companies'
         verbose_name_plural = 'Companies'
+        indexes = [
+            GinIndex(fields=['company_name'], name='companies_name_trgm',
+                     opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['email'], name='companies_email_trgm',
+                     opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.company_name
@@ -38,12 +62,49 @@ class Company(models.Model):
         self.status = 'approved'
         self.approved_date = timezone.now()
         self.save()
+        self.jobs.refresh_listed()
     
     def reject(self, reason=''):
         """Reject company registration"""
         self.status = 'rejected'
         self.rejection_reason = reason
         self.save()
+        self.jobs.refresh_listed()
+
+
+class JobQuerySet(models.QuerySet):
+    def refresh_listed(self):
+        """Recompute is_listed for every job in the queryset with one UPDATE"""
+        approved = models.Exists(
+            Company.objects.filter(pk=models.OuterRef('company_id'), status='approved')
+        )
+        listed = (
+            models.Q(is_active=True) &
+            (models.Q(deadline__isnull=True) | models.Q(deadline__gte=timezone.localdate())) &
+            models.Q(approved)
+        )
+        listed = models.ExpressionWrapper(listed, output_field=models.BooleanField())
+        # Only touch rows whose flag changes, so updated_at stays meaningful
+        updated = self.alias(should_list=listed).exclude(is_listed=models.F('should_list')).update(
+            is_listed=listed, updated_at=Now()
+        )
+        if updated:
+            # Bulk updates skip the save signals that invalidate search caches
+            bump_generation()
+        return updated
+    
+    def with_state(self, state):
+        """Jobs in one of Job.STATE_CHOICES; all jobs for a falsy state"""
+        return self.filter(Job.state_filter(state)) if state else self
+    
+    def unlist_expired(self):
+        """Unlist jobs whose deadline has passed"""
+        updated = self.filter(is_listed=True, deadline__lt=timezone.localdate()).update(
+            is_listed=False, updated_at=Now()
+        )
+        if updated:
+            bump_generation()
+        return updated
 
 
 class Job(models.Model):
@@ -78,15 +139,241 @@ class Job(models.Model):
     posted_date = models.DateTimeField(auto_now_add=True)
     deadline = models.DateField(null=True, blank=True)
     views_count = models.IntegerField(default=0)
+    # Denormalized "shown on public listings": active, from an approved
+    # company and not past its deadline. Maintained by save(),
+    # JobQuerySet.refresh_listed() and the unlist_expired_jobs command.
+    is_listed = models.BooleanField(default=False, editable=False)
+    # Last change to anything shown on job pages; drives conditional GETs.
+    # Buffered views_count updates deliberately leave it alone.
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    # Fields that feed search_vector
+    SEARCH_FIELDS = ('title', 'category', 'description')
+    
+    # Public listing sort orders. Each ordering is served by one of the
+    # partial indexes in Meta; nullable keys sort last.
+    SORT_CHOICES = (
+        ('newest', 'Newest First'),
+        ('salary_high', 'Salary: High to Low'),
+        ('salary_low', 'Salary: Low to High'),
+        ('most_viewed', 'Most Viewed'),
+        ('deadline', 'Deadline Soonest'),
+    )
+    SORT_ORDERING = {
+        'newest': ('-posted_date', '-id'),
+        'salary_high': ('-salary_max', '-id'),
+        'salary_low': ('salary_min', 'id'),
+        'most_viewed': ('-views_count', '-id'),
+        'deadline': ('deadline', 'id'),
+    }
+    DEFAULT_SORT = 'newest'
+    
+    # Company job list filters (see JobQuerySet.with_state)
+    STATE_CHOICES = (
+        ('active', 'Active'),
+        ('expired', 'Expired'),
+        ('inactive', 'Inactive'),
+    )
+    
+    objects = JobQuerySet.as_manager()
     
     class Meta:
         db_table = 'jobs'
         ordering = ['-posted_date']
+        indexes = [
+            models.Index(fields=['-posted_date', '-id'], name='jobs_listed_newest_idx',
+                         condition=models.Q(is_listed=True)),
+            models.Index(models.F('salary_max').desc(nulls_last=True), models.F('id').desc(),
+                         name='jobs_listed_salary_high_idx', condition=models.Q(is_listed=True)),
+            models.Index(fields=['salary_min', 'id'], name='jobs_listed_salary_low_idx',
+                         condition=models.Q(is_listed=True)),
+            models.Index(fields=['-views_count', '-id'], name='jobs_listed_most_viewed_idx',
+                         condition=models.Q(is_listed=True)),
+            models.Index(fields=['deadline', 'id'], name='jobs_listed_deadline_idx',
+                         condition=models.Q(is_listed=True)),
+            # Company job list, newest first (keyset pagination)
+            models.Index(fields=['company', '-posted_date', '-id'], name='jobs_company_newest_idx'),
+            # Jobs changed since the matching index last refreshed
+            models.Index(fields=['updated_at'], name='jobs_updated_at_idx'),
+            GinIndex(fields=['search_vector'], name='jobs_search_vector_gin'),
+            GinIndex(fields=['city'], name='jobs_city_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['location'], name='jobs_location_trgm', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.company.company_name}"
     
-    def increment_views(self):
-        """Increment job view count"""
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
\ No newline at end of file
+    @staticmethod
+    def state_filter(state):
+        """Q for the jobs in one of STATE_CHOICES, as seen by their company"""
+        today = timezone.localdate()
+        if state == 'active':
+            return models.Q(is_active=True) & (models.Q(deadline__isnull=True) | models.Q(deadline__gte=today))
+        if state == 'expired':
+            return models.Q(is_active=True, deadline__lt=today)
+        if state == 'inactive':
+            return models.Q(is_active=False)
+        raise ValueError(f'Unknown job state: {state}')
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'is_active', 'deadline'} & set(update_fields):
+            self.is_listed = self.compute_listed()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'is_listed'}
+        super().save(*args, **kwargs)
+        if update_fields is None or set(update_fields) & set(self.SEARCH_FIELDS):
+            self.update_search_vector()
+    
+    def compute_listed(self):
+        """Whether this job belongs on the public listings"""
+        if not self.is_active or self.company.status != 'approved':
+            return False
+        return self.deadline is None or self.deadline >= timezone.localdate()
+    
+    def update_search_vector(self):
+        """Recompute the stored tsvector (PostgreSQL only)"""
+        if connection.vendor != 'postgresql':
+            return
+        Job.objects.filter(pk=self.pk).update(search_vector=job_search_vector())
+
+
+class CompanyStats(models.Model):
+    """Dashboard counters of a company, kept current incrementally.
+
+    Job counts are recounted from the company's jobs whenever one is saved
+    or deleted; application and view counters are adjusted by deltas in
+    the transactions that change them (see ``add_for_jobs``).
+    """
+    # Mirrors jobs.Application.STATUS_CHOICES
+    APPLICATION_STATUSES = (
+        'submitted', 'under_review', 'shortlisted', 'interview_scheduled', 'accepted', 'rejected',
+    )
+    # Columns adjusted by deltas
+    COUNTERS = ('total_applications', *[f'applications_{status}' for status in APPLICATION_STATUSES],
+                'total_views')
+    
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    total_jobs = models.PositiveIntegerField(default=0)
+    active_jobs = models.PositiveIntegerField(default=0)
+    total_applications = models.IntegerField(default=0)
+    applications_submitted = models.IntegerField(default=0)
+    applications_under_review = models.IntegerField(default=0)
+    applications_shortlisted = models.IntegerField(default=0)
+    applications_interview_scheduled = models.IntegerField(default=0)
+    applications_accepted = models.IntegerField(default=0)
+    applications_rejected = models.IntegerField(default=0)
+    total_views = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'company_stats'
+        verbose_name_plural = 'Company stats'
+    
+    def __str__(self):
+        return f"Stats of {self.company_id}"
+    
+    def applications_by_status(self):
+        """{status: count}"""
+        return {status: getattr(self, f'applications_{status}') for status in self.APPLICATION_STATUSES}
+    
+    @classmethod
+    def for_company(cls, company):
+        """The company's stats row, counting from scratch if it is missing"""
+        try:
+            return company.stats
+        except cls.DoesNotExist:
+            cls.recompute([company.pk])
+            return cls.objects.get(pk=company.pk)
+    
+    @classmethod
+    def add(cls, deltas, heal=True):
+        """Add ``{company_id: {counter: n}}`` to the stored counters in one
+        UPDATE. Companies without a row are recounted when ``heal`` is set;
+        deletions pass False, as the company may be going away too."""
+        deltas = {company_id: counts for company_id, counts in deltas.items() if any(counts.values())}
+        if not deltas:
+            return
+        columns = ', '.join(cls.COUNTERS)
+        placeholders = ', '.join(['%s'] * len(cls.COUNTERS))
+        rows = ', '.join([f'(%s::bigint, {placeholders})'] * len(deltas))
+        params = [timezone.now()]
+        for company_id in sorted(deltas):
+            params += [company_id, *[deltas[company_id].get(counter, 0) for counter in cls.COUNTERS]]
+        assignments = ', '.join(f'{counter} = stats.{counter} + delta.{counter}' for counter in cls.COUNTERS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {cls._meta.db_table} AS stats SET {assignments}, updated_at = %s '
+                f'FROM (VALUES {rows}) AS delta(company_id, {columns}) '
+                f'WHERE stats.company_id = delta.company_id RETURNING stats.company_id',
+                params,
+            )
+            missing = set(deltas) - {row[0] for row in cursor.fetchall()}
+        if missing and heal:
+            cls.recompute(missing)
+    
+    @classmethod
+    def add_for_jobs(cls, deltas, heal=True):
+        """Like ``add``, with deltas keyed by job id"""
+        companies = dict(Job.objects.filter(pk__in=list(deltas)).values_list('id', 'company_id'))
+        by_company = {}
+        for job_id, counts in deltas.items():
+            if job_id in companies:
+                totals = by_company.setdefault(companies[job_id], {})
+                for counter, n in counts.items():
+                    totals[counter] = totals.get(counter, 0) + n
+        cls.add(by_company, heal)
+    
+    @classmethod
+    def refresh_jobs(cls, company_id, heal=True):
+        """Recount the company's jobs into its row with one UPDATE"""
+        jobs = Job.objects.filter(company_id=company_id).order_by().values('company_id')
+        updated = cls.objects.filter(pk=company_id).update(
+            total_jobs=Coalesce(models.Subquery(jobs.annotate(n=models.Count('pk')).values('n')), 0),
+            active_jobs=Coalesce(models.Subquery(
+                jobs.filter(is_active=True).annotate(n=models.Count('pk')).values('n')
+            ), 0),
+            updated_at=Now(),
+        )
+        if not updated and heal:
+            cls.recompute([company_id])
+    
+    @classmethod
+    def recompute(cls, company_ids=None):
+        """Count every counter from scratch for the given (or all) companies"""
+        Application = apps.get_model('jobs', 'Application')
+        companies = Company.objects.all()
+        if company_ids is not None:
+            companies = companies.filter(pk__in=list(company_ids))
+        rows = {company_id: cls(company_id=company_id) for company_id in companies.values_list('pk', flat=True)}
+        
+        jobs = Job.objects.filter(company_id__in=list(rows)).order_by().values('company_id').annotate(
+            total=models.Count('pk'),
+            active=models.Count('pk', filter=models.Q(is_active=True)),
+            views=models.Sum('views_count'),
+        )
+        for row in jobs:
+            stats = rows[row['company_id']]
+            stats.total_jobs, stats.active_jobs, stats.total_views = row['total'], row['active'], row['views'] or 0
+        
+        applications = Application.objects.filter(job__company_id__in=list(rows)).order_by().values(
+            'job__company_id'
+        ).annotate(
+            total=models.Count('pk'),
+            **{status: models.Count('pk', filter=models.Q(status=status)) for status in cls.APPLICATION_STATUSES},
+        )
+        for row in applications:
+            stats = rows[row['job__company_id']]
+            stats.total_applications = row['total']
+            for status in cls.APPLICATION_STATUSES:
+                setattr(stats, f'applications_{status}', row[status])
+        
+        cls.objects.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=['company'],
+            update_fields=['total_jobs', 'active_jobs', *cls.COUNTERS, 'updated_at'],
+        )
+        return len(rows)
+
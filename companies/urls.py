@@ -7,8 +7,11 @@ urlpatterns = [
     path('profile/', views.company_profile, name='company_profile'),
     path('jobs/', views.company_job_list, name='company_job_list'),
     path('jobs/create/', views.job_create, name='job_create'),
-    path('jobs//edit/', views.job_edit, name='job_edit'),
-    path('jobs//delete/', views.job_delete, name='job_delete'),
+    path('jobs/<int:pk>/edit/', views.job_edit, name='job_edit'),
+    path('jobs/<int:pk>/delete/', views.job_delete, name='job_delete'),
+    path('jobs/<int:pk>/stats/', views.job_stats, name='job_stats'),
     path('applications/', views.application_list, name='company_application_list'),
-    path('applications//', views.application_detail, name='application_detail'),
+    path('applications/bulk-status/', views.application_bulk_status, name='company_application_bulk_status'),
+    path('applications/<int:pk>/', views.application_detail, name='application_detail'),
+    path('applications/<int:pk>/resume/', views.application_resume, name='application_resume'),
 ]
@@ -1,9 +1,25 @@
+import os
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import Company, Job
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+from .models import Company, CompanyStats, Job
 from .forms import CompanyRegistrationForm, CompanyProfileForm, JobForm
-from jobs.models import Application
+from jobs.models import Application, JobFunnelStage, SavedJob
+from jobs.downloads import send_file
+from jobs.funnel import job_funnel
+from jobs.job_stats import daily_series
+from jobs.matching import candidate_scores
+from jobs.pagination import KeysetPaginator
+from jobs.search import application_search
+from jobs.status_updates import bulk_set_status
 from accounts.decorators import user_type_required, company_approved_required
 
 def company_register(request):
@@ -26,23 +42,27 @@ def company_register(request):
 @user_type_required('company')
 def company_dashboard(request):
     """Company dashboard"""
-    try:
-        company = request.user.company_profile
-    except:
+    company = Company.objects.select_related('stats').filter(user=request.user).first()
+    if company is None:
         messages.error(request, 'Company profile not found.')
         return redirect('home')
     
-    # Get statistics
-    total_jobs = company.jobs.count()
-    active_jobs = company.jobs.filter(is_active=True).count()
-    total_applications = Application.objects.filter(job__company=company).count()
-    recent_applications = Application.objects.filter(job__company=company).order_by('-applied_date')[:5]
+    # Counters are maintained incrementally (CompanyStats)
+    stats = CompanyStats.for_company(company)
+    by_status = stats.applications_by_status()
+    recent_applications = Application.objects.filter(job__company=company).select_related(
+        'job', 'applicant'
+    ).order_by('-applied_date', '-id')[:5]
     
     context = {
         'company': company,
-        'total_jobs': total_jobs,
-        'active_jobs': active_jobs,
-        'total_applications': total_applications,
+        'total_jobs': stats.total_jobs,
+        'active_jobs': stats.active_jobs,
+        'total_applications': stats.total_applications,
+        'total_views': stats.total_views,
+        'applications_by_status': [
+            (value, label, by_status[value]) for value, label in Application.STATUS_CHOICES
+        ],
         'recent_applications': recent_applications,
     }
     return render(request, 'company/dashboard.html', context)
@@ -88,32 +108,166 @@ def job_edit(request, pk):
 def company_job_list(request):
     """List company's jobs"""
     company = request.user.company_profile
-    jobs = company.jobs.all().order_by('-posted_date')
+    state = request.GET.get('state')
+    if state not in dict(Job.STATE_CHOICES):
+        state = None
+    jobs = company.jobs.with_state(state).only(
+        'id', 'company_id', 'title', 'city', 'job_type', 'description', 'vacancies',
+        'is_active', 'deadline', 'posted_date', 'views_count',
+    )
+    
+    # Newest first, one index range scan per page whatever the history size
+    paginator = KeysetPaginator(jobs.order_by('-posted_date', '-id'), 20)
+    jobs_page = paginator.get_page(request.GET.get('cursor'), request.GET)
+    
+    activity = _job_activity([job.pk for job in jobs_page])
+    today = timezone.localdate()
+    for job in jobs_page:
+        job.activity = activity[job.pk]
+        job.is_expired = job.deadline is not None and job.deadline < today
     
-    return render(request, 'company/job_list.html', {'jobs': jobs})
+    state_counts = company.jobs.order_by().aggregate(
+        all=Count('pk'),
+        **{value: Count('pk', filter=Job.state_filter(value)) for value, _ in Job.STATE_CHOICES},
+    )
+    
+    return render(request, 'company/job_list.html', {
+        'jobs': jobs_page,
+        'state': state,
+        'state_counts': [(value, label, state_counts[value]) for value, label in Job.STATE_CHOICES],
+        'total_jobs': state_counts['all'],
+    })
 
-@login_required
-@company_approved_required
-def application_list(request):
-    """View all applications for company"""
-    company = request.user.company_profile
-    applications = Application.objects.filter(job__company=company).select_related('job', 'applicant')
+def _job_activity(job_ids):
+    """Application counts by status and saves of each listed job from one
+    grouped query"""
+    saves = SavedJob.objects.filter(job=OuterRef('pk')).order_by().values('job').annotate(
+        count=Count('pk'),
+    ).values('count')
+    rows = Job.objects.filter(pk__in=job_ids).order_by().values('pk').annotate(
+        applications_total=Count('applications'),
+        **{
+            f'applications_{value}': Count('applications', filter=Q(applications__status=value))
+            for value, _ in Application.STATUS_CHOICES
+        },
+        saves=Coalesce(Subquery(saves), 0),
+    )
+    activity = {}
+    for row in rows:
+        activity[row['pk']] = {
+            'applications': row['applications_total'],
+            'by_status': [
+                (value, label, row[f'applications_{value}']) for value, label in Application.STATUS_CHOICES
+            ],
+            'saves': row['saves'],
+        }
+    return activity
+
+def _filter_applications(company, params):
+    """Company's applications narrowed by the application_list filters"""
+    applications = Application.objects.filter(job__company=company)
     
     # Filter by status
-    status = request.GET.get('status')
+    status = params.get('status')
     if status:
         applications = applications.filter(status=status)
     
     # Filter by job
-    job_id = request.GET.get('job')
-    if job_id:
+    job_id = params.get('job')
+    if job_id and job_id.isdigit():
         applications = applications.filter(job_id=job_id)
     
+    # Keyword search over cover letters and extracted resume text
+    keyword = params.get('q', '').strip()
+    if keyword:
+        applications = application_search(applications, keyword)
+    
+    return applications
+
+def _application_counts(company, job_id=None):
+    """Per-status counts (of the selected job, if any) and per-job totals,
+    read from the maintained counters: the company's CompanyStats row and
+    the per-job funnel stages, whose ``current`` is the number of
+    applications in that status"""
+    stages = JobFunnelStage.objects.filter(job__company=company).values_list('job_id', 'status', 'current')
+    job_counts, job_statuses = {}, {}
+    for stage_job_id, status, current in stages:
+        job_counts[stage_job_id] = job_counts.get(stage_job_id, 0) + current
+        if job_id and str(stage_job_id) == job_id:
+            job_statuses[status] = current
+    if job_id:
+        by_status, total = job_statuses, sum(job_statuses.values())
+    else:
+        stats = CompanyStats.for_company(company)
+        by_status, total = stats.applications_by_status(), stats.total_applications
+    status_counts = [(value, label, by_status.get(value, 0)) for value, label in Application.STATUS_CHOICES]
+    return {'total': total, 'by_status': status_counts}, job_counts
+
+@login_required
+@company_approved_required
+def application_list(request):
+    """View all applications for company"""
+    company = request.user.company_profile
+    applications = _filter_applications(company, request.GET).select_related('job', 'applicant')
+    job_id = request.GET.get('job')
+    keyword = request.GET.get('q', '').strip()
+    
+    # Newest first, one index range scan per page whatever the history size
+    paginator = KeysetPaginator(applications.order_by('-applied_date', '-id'), 25)
+    applications_page = paginator.get_page(request.GET.get('cursor'), request.GET)
+    
+    status_counts, job_counts = _application_counts(company, job_id)
+    
+    # Applicants whose profiles best match the selected job
+    best_candidates, funnel = [], []
+    job = company.jobs.filter(pk=job_id).first() if job_id and job_id.isdigit() else None
+    if job:
+        scores = candidate_scores(job, applications.values_list('applicant_id', flat=True))
+        top = [user_id for user_id in sorted(scores, key=scores.get, reverse=True) if scores[user_id] > 0][:5]
+        for application in applications.filter(applicant_id__in=top):
+            application.match_score = scores[application.applicant_id]
+            best_candidates.append(application)
+        best_candidates.sort(key=lambda application: -application.match_score)
+        funnel = job_funnel(job)
+    
+    jobs = list(company.jobs.order_by('title').only('id', 'title', 'company_id'))
+    for listed_job in jobs:
+        listed_job.application_count = job_counts.get(listed_job.pk, 0)
+    
     return render(request, 'company/application_list.html', {
-        'applications': applications,
-        'company': company
+        'applications': applications_page,
+        'best_candidates': best_candidates,
+        'funnel': funnel,
+        'company': company,
+        'jobs': jobs,
+        'status_counts': status_counts,
+        'status_choices': Application.STATUS_CHOICES,
+        'keyword': keyword,
     })
 
+@login_required
+@company_approved_required
+@require_POST
+def application_bulk_status(request):
+    """Move the selected applications, or all matching the list filters, to a new status"""
+    company = request.user.company_profile
+    status = request.POST.get('new_status')
+    if status not in dict(Application.STATUS_CHOICES):
+        messages.error(request, 'Please choose a valid status.')
+    else:
+        # The list filters arrive in the query string, as on application_list
+        applications = _filter_applications(company, request.GET)
+        if request.POST.get('scope') != 'filtered':
+            ids = [pk for pk in request.POST.getlist('applications') if pk.isdigit()]
+            applications = applications.filter(pk__in=ids)
+        updated = bulk_set_status(applications, status)
+        messages.success(request, f'{updated} application(s) moved to {dict(Application.STATUS_CHOICES)[status]}.')
+    
+    url = reverse('company_application_list')
+    if request.GET:
+        url = f'{url}?{request.GET.urlencode()}'
+    return redirect(url)
+
 @login_required
 @user_type_required('company')
 def company_profile(request):
@@ -135,6 +289,17 @@ def company_profile(request):
     
     return render(request, 'company/profile.html', {'form': form, 'company': company})
 
+@login_required
+@company_approved_required
+def job_stats(request, pk):
+    """Daily views, unique viewers, applications and saves of a job as chart-ready JSON"""
+    job = get_object_or_404(Job.objects.only('id'), pk=pk, company=request.user.company_profile)
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), settings.JOB_STATS_RETENTION_DAYS)
+    except ValueError:
+        days = 30
+    return JsonResponse(daily_series(job, days))
+
 @login_required
 @company_approved_required
 def job_delete(request, pk):
@@ -149,6 +314,19 @@ def job_delete(request, pk):
     
     return render(request, 'company/job_delete_confirm.html', {'job': job})
 
+@login_required
+@user_type_required('company')
+def application_resume(request, pk):
+    """Download an applicant's resume; ownership is checked in the same query"""
+    application = get_object_or_404(
+        Application.objects.select_related('applicant').only('resume', 'applicant__username'),
+        pk=pk, job__company__user=request.user, job__company__status='approved',
+    )
+    if not application.resume:
+        raise Http404('No resume uploaded')
+    extension = os.path.splitext(application.resume.name)[1] or '.pdf'
+    return send_file(request, application.resume, f'{application.applicant.username}_resume{extension}')
+
 @login_required
 @company_approved_required
 def application_detail(request, pk):
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Your apps
     'accounts',
@@ -55,6 +56,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.media',
+                'jobs.context_processors.user_jobs',
             ],
         },
     },
@@ -138,4 +140,44 @@ LOGOUT_REDIRECT_URL = 'home'
 
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
\ No newline at end of file
+DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
+# Resume uploads (see jobs/validators.py)
+RESUME_MAX_SIZE = 5242880  # 5MB
+RESUME_MAX_PAGES = config('RESUME_MAX_PAGES', default=20, cast=int)
+RESUME_MAX_EMBEDDED_OBJECTS = config('RESUME_MAX_EMBEDDED_OBJECTS', default=0, cast=int)  # attachments, scripts
+# Resume downloads (see jobs/downloads.py): '' streams from Django, 'nginx'
+# uses X-Accel-Redirect to RESUME_SENDFILE_PREFIX, 'sendfile' uses X-Sendfile
+RESUME_SENDFILE_BACKEND = config('RESUME_SENDFILE_BACKEND', default='')
+RESUME_SENDFILE_PREFIX = config('RESUME_SENDFILE_PREFIX', default='/protected-media/')  # nginx internal location
+# Hash uploads while they stream in (content-addressed resume storage)
+FILE_UPLOAD_HANDLERS = [
+    'jobs.storage.HashingMemoryFileUploadHandler',
+    'jobs.storage.HashingTemporaryFileUploadHandler',
+]
+
+# Cache
+# The search caches and their invalidation counter must be shared by all
+# workers in production, e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# with CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='job-portal'),
+    }
+}
+
+# Job Search
+JOB_FACET_CACHE_TIMEOUT = config('JOB_FACET_CACHE_TIMEOUT', default=300, cast=int)  # seconds
+JOB_SEARCH_CACHE_TIMEOUT = config('JOB_SEARCH_CACHE_TIMEOUT', default=300, cast=int)  # seconds
+JOB_SEARCH_CACHE_MAX_IDS = config('JOB_SEARCH_CACHE_MAX_IDS', default=1000, cast=int)
+
+# Page caching (see jobs/page_cache.py)
+ANONYMOUS_PAGE_CACHE_TIMEOUT = config('ANONYMOUS_PAGE_CACHE_TIMEOUT', default=120, cast=int)  # seconds
+JOB_CARD_CACHE_TIMEOUT = config('JOB_CARD_CACHE_TIMEOUT', default=600, cast=int)  # seconds
+
+# Job view counting (write-behind buffer, see jobs/view_counter.py)
+JOB_VIEW_FLUSH_INTERVAL = config('JOB_VIEW_FLUSH_INTERVAL', default=10, cast=int)  # seconds
+JOB_VIEW_MAX_BUFFER = config('JOB_VIEW_MAX_BUFFER', default=1000, cast=int)  # pending views
+
+# Daily job activity rollups (see jobs/job_stats.py)
+JOB_STATS_RETENTION_DAYS = config('JOB_STATS_RETENTION_DAYS', default=365, cast=int)  # days
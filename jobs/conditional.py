@@ -0,0 +1,92 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.views.decorators.http import condition
+from companies.models import Job
+from .page_cache import has_pending_messages
+from .recommender import similar_jobs_version
+from .user_jobs import user_job_ids
+
+
+def _viewer_state(request):
+    """The part of a page that differs per visitor: who they are and which
+    jobs they have applied to / saved"""
+    if not request.user.is_authenticated:
+        return 'anon'
+    ids = user_job_ids(request)
+    return [request.user.pk, sorted(ids.applied), sorted(ids.saved)]
+
+
+def _etag(*parts):
+    digest = hashlib.md5(json.dumps(parts, default=str).encode()).hexdigest()
+    # Weak: equivalent pages, not byte-identical (timesince, csrf tokens)
+    return f'W/"{digest}"'
+
+
+def conditional_page(validators, on_not_modified=None):
+    """Answer If-None-Match / If-Modified-Since before the view runs.
+
+    ``validators(request, *args, **kwargs)`` returns ``(etag_parts,
+    last_modified)`` or None to skip the check (e.g. for a 404). Content
+    validators are combined with the viewer's state, and Last-Modified is
+    only sent to anonymous visitors since it cannot see per-user changes.
+    ``on_not_modified`` runs for requests answered with a 304.
+    """
+    def _validators(request, *args, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            result = None
+            if not has_pending_messages(request):
+                result = validators(request, *args, **kwargs)
+            request._page_validators = result
+        return request._page_validators
+
+    def etag_func(request, *args, **kwargs):
+        result = _validators(request, *args, **kwargs)
+        if result is None:
+            return None
+        return _etag(result[0], _viewer_state(request))
+
+    def last_modified_func(request, *args, **kwargs):
+        result = _validators(request, *args, **kwargs)
+        if result is None or request.user.is_authenticated:
+            return None
+        return result[1]
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func, last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code == 304 and on_not_modified is not None:
+                on_not_modified(request, *args, **kwargs)
+            return response
+        return wrapper
+    return decorator
+
+
+def job_validators(request, pk):
+    """A job page changes with the job or its company"""
+    row = Job.objects.filter(pk=pk, is_active=True).values_list(
+        'updated_at', 'company__updated_at'
+    ).first()
+    if row is None:
+        return None
+    last_modified = max(row)
+    return [pk, last_modified, similar_jobs_version()], last_modified
+
+
+def listing_validators(paginator, cursor=''):
+    """A result page is a slice of the cached search entry, so it is
+    validated by that entry: its key carries the listings generation
+    (bumped by any job or company change), the page's ids carry the sort
+    order (view counts reorder most_viewed without a bump) and the total.
+
+    Pages past the cached ids are seeked from the database and not
+    validated. There is no Last-Modified: the entry has no timestamp.
+    """
+    ids = paginator.page_ids(cursor)
+    if ids is None:
+        return None
+    return [paginator.key, cursor, ids, paginator.entry['count']], None
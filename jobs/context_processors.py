@@ -0,0 +1,7 @@
+from django.utils.functional import SimpleLazyObject
+from .user_jobs import user_job_ids
+
+
+def user_jobs(request):
+    """Expose the user's applied/saved job ids; loaded only if a template uses them"""
+    return {'user_jobs': SimpleLazyObject(lambda: user_job_ids(request))}
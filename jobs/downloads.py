@@ -0,0 +1,122 @@
+"""
+Protected file downloads.
+
+Views authorize the request, then ``send_file`` hands the bytes over to
+the front-end server when RESUME_SENDFILE_BACKEND is set:
+
+* ``nginx``: ``X-Accel-Redirect`` to an ``internal`` location mapped onto
+  MEDIA_ROOT, e.g. ``location /protected-media/ { internal; alias /srv/media/; }``
+* ``sendfile``: ``X-Sendfile`` with the absolute path (Apache
+  mod_xsendfile, lighttpd)
+
+so no Python worker is tied up while a file is sent. Without a backend
+the file is streamed by Django with single-range ``Range`` support.
+Content-addressed files never change, so their hash is a strong ETag.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from .storage import is_blob_name
+
+CHUNK_SIZE = 64 * 1024
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _etag(name):
+    if is_blob_name(name):
+        return '"%s"' % os.path.splitext(os.path.basename(name))[0]
+    return None
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single byte range; None to send the
+    whole file, ValueError when the range cannot be satisfied"""
+    match = RANGE.match(header.replace(' ', '')) if header else None
+    if not match or match.groups() == ('', ''):
+        # Absent, malformed or multi-range: ignoring Range is allowed
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _read_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def send_file(request, field_file, filename):
+    """Response delivering ``field_file`` as an attachment named ``filename``"""
+    name = field_file.name
+    storage = field_file.storage
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    etag = _etag(name)
+    if etag and etag in request.headers.get('If-None-Match', ''):
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    backend = settings.RESUME_SENDFILE_BACKEND
+    if backend == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.RESUME_SENDFILE_PREFIX.rstrip('/') + '/' + name)
+    elif backend == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = storage.path(name)
+    else:
+        response = _stream(request, storage, name, content_type, etag)
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['Cache-Control'] = 'private, max-age=3600'
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+def _stream(request, storage, name, content_type, etag):
+    size = storage.size(name)
+    header = request.headers.get('Range')
+    # A stale If-Range means the client's partial copy is outdated
+    if header and request.headers.get('If-Range', etag) != etag:
+        header = None
+    try:
+        byte_range = parse_range(header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        # FileResponse lets the WSGI server use wsgi.file_wrapper/sendfile()
+        response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(storage.open(name, 'rb'), start, end - start + 1),
+            status=206, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
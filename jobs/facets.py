@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from companies.models import Job
+from .search_cache import cache_key
+
+# (Job field, query parameter, label) for every facet shown on job_list
+FACETS = (
+    ('job_type', 'job_type', 'Job Type'),
+    ('experience_required', 'experience', 'Experience Level'),
+    ('category', 'category', 'Category'),
+    ('city', 'city', 'City'),
+)
+FACET_FIELDS = tuple(field for field, _, _ in FACETS)
+
+
+def facet_counts(jobs, fields=FACET_FIELDS):
+    """Count jobs per distinct value of each field in a single query.
+
+    Returns ``{field: {value: count}}``. PostgreSQL groups the filtered
+    rows once with ``GROUPING SETS``; other backends run the grouped
+    subqueries as one ``UNION ALL`` statement.
+    """
+    fields = tuple(fields)
+    inner_sql, inner_params = jobs.order_by().values(*fields).query.sql_with_params()
+    quote = connection.ops.quote_name
+    columns = [quote(field) for field in fields]
+
+    if connection.vendor == 'postgresql':
+        grouping = ', '.join(f'GROUPING({column})' for column in columns)
+        sets = ', '.join(f'({column})' for column in columns)
+        sql = (
+            f'SELECT {", ".join(columns)}, {grouping}, COUNT(*) '
+            f'FROM ({inner_sql}) AS filtered GROUP BY GROUPING SETS ({sets})'
+        )
+        params = inner_params
+    else:
+        parts = [
+            f'SELECT {index}, {column}, COUNT(*) FROM ({inner_sql}) AS filtered GROUP BY {column}'
+            for index, column in enumerate(columns)
+        ]
+        sql = ' UNION ALL '.join(parts)
+        params = inner_params * len(columns)
+
+    counts = {field: {} for field in fields}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    for row in rows:
+        if connection.vendor == 'postgresql':
+            values, groupings, count = row[:len(fields)], row[len(fields):-1], row[-1]
+            # GROUPING() is 0 for the column the row was grouped by
+            index = groupings.index(0)
+            value = values[index]
+        else:
+            index, value, count = row
+        counts[fields[index]][value] = count
+    return counts
+
+
+def cached_facet_counts(jobs, **filters):
+    """facet_counts() cached per normalized keyword/location filter set"""
+    key = cache_key('job_facets', **filters)
+    counts = cache.get(key)
+    if counts is None:
+        counts = facet_counts(jobs)
+        cache.set(key, counts, settings.JOB_FACET_CACHE_TIMEOUT)
+    return counts
+
+
+def build_facets(counts, query_params, limit=10):
+    """Template-ready facets: each value with its count and filter link"""
+    choice_labels = {
+        'job_type': dict(Job.JOB_TYPE_CHOICES),
+        'experience_required': dict(Job.EXPERIENCE_CHOICES),
+    }
+    facets = []
+    for field, param, label in FACETS:
+        selected = query_params.get(param, '')
+        labels = choice_labels.get(field, {})
+        values = sorted(counts.get(field, {}).items(), key=lambda item: (-item[1], str(item[0])))
+        items = []
+        for value, count in values[:limit]:
+            params = query_params.copy()
+            params.pop('cursor', None)
+            if value == selected:
+                params.pop(param, None)
+            else:
+                params[param] = value
+            items.append({
+                'value': value,
+                'label': labels.get(value, value),
+                'count': count,
+                'selected': value == selected,
+                'query': params.urlencode(),
+            })
+        facets.append({'param': param, 'label': label, 'items': items})
+    return facets
@@ -1,6 +1,7 @@
 from django import forms
 from .models import Application
 from companies.models import Job
+from .validators import validate_resume
 
 class ApplicationForm(forms.ModelForm):
     """Job Application Form"""
@@ -21,13 +22,8 @@ class ApplicationForm(forms.ModelForm):
     def clean_resume(self):
         resume = self.cleaned_data.get('resume')
         if resume:
-            # Check file size (5MB max)
-            if resume.size > 5 * 1024 * 1024:
-                raise forms.ValidationError('Resume file size must not exceed 5MB.')
-            
-            # Check file extension
-            if not resume.name.endswith('.pdf'):
-                raise forms.ValidationError('Only PDF files are allowed.')
+            # Size, extension and PDF structure, without reading the whole file
+            validate_resume(resume)
         
         return resume
     
@@ -60,4 +56,10 @@ class JobSearchForm(forms.Form):
     category = forms.CharField(max_length=100, required=False, widget=forms.TextInput(attrs={
         'class': 'form-control',
         'placeholder': 'Category'
-    }))
\ No newline at end of file
+    }))
+    city = forms.CharField(max_length=100, required=False, widget=forms.HiddenInput())
+    sort = forms.ChoiceField(
+        choices=[('', 'Most Relevant')] + list(Job.SORT_CHOICES),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Application status history and per-job hiring funnels.
+
+Every status change appends an ``ApplicationEvent`` and folds into the
+``JobFunnelStage`` counters of the job, in the transaction that changed
+the status: the stage entered gets ``entered``/``current`` incremented,
+the stage left gets ``current`` decremented and the time spent in it
+added to ``total_seconds`` and a log-scale duration histogram. Changes
+are first summed per (job, status) and then applied with one upsert,
+so a bulk change of thousands of applications costs one statement.
+Funnel reports read one row per stage; the median time in a stage is
+estimated from its histogram. The rebuild_application_funnel command
+backfills history for older applications and recomputes the counters.
+"""
+
+import math
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from companies.models import CompanyStats
+from .models import Application, ApplicationEvent, JobFunnelStage
+
+BUCKETS = JobFunnelStage.HISTOGRAM_BUCKETS
+EVENT_BATCH_SIZE = 5000
+
+
+def duration_bucket(seconds):
+    """Histogram bucket of a stay in a stage"""
+    minutes = max(seconds / 60, 1)
+    return min(int(math.log2(minutes)), BUCKETS - 1)
+
+
+class FunnelDeltas(defaultdict):
+    """Pending counter changes: (job_id, status) -> [entered, current, exited, seconds, histogram]"""
+
+    def __init__(self):
+        super().__init__(lambda: [0, 0, 0, 0.0, [0] * BUCKETS])
+
+    def add(self, job_id, from_status, from_date, to_status, at):
+        entering = self[job_id, to_status]
+        entering[0] += 1
+        entering[1] += 1
+        if from_status:
+            seconds = max((at - from_date).total_seconds(), 0) if from_date else 0
+            leaving = self[job_id, from_status]
+            leaving[1] -= 1
+            leaving[2] += 1
+            leaving[3] += seconds
+            leaving[4][duration_bucket(seconds)] += 1
+
+
+def apply_deltas(deltas):
+    """Add the deltas to the stored counters with one upsert"""
+    if not deltas:
+        return
+    # A fixed order keeps concurrent bulk changes from deadlocking
+    keys = sorted(deltas)
+    rows = ', '.join(['(%s, %s, %s, %s, %s, %s, %s::bigint[])'] * len(keys))
+    params = []
+    for job_id, status in keys:
+        entered, current, exited, seconds, histogram = deltas[job_id, status]
+        params += [job_id, status, entered, current, exited, seconds, histogram]
+    table = JobFunnelStage._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} AS stage '
+            f'(job_id, status, entered, current, exited, total_seconds, duration_histogram) '
+            f'VALUES {rows} '
+            f'ON CONFLICT (job_id, status) DO UPDATE SET '
+            f'entered = stage.entered + EXCLUDED.entered, '
+            f'current = stage.current + EXCLUDED.current, '
+            f'exited = stage.exited + EXCLUDED.exited, '
+            f'total_seconds = stage.total_seconds + EXCLUDED.total_seconds, '
+            f'duration_histogram = ARRAY('
+            f'SELECT coalesce(a, 0) + coalesce(b, 0) '
+            f'FROM unnest(stage.duration_histogram, EXCLUDED.duration_histogram) '
+            f'WITH ORDINALITY AS h(a, b, i) ORDER BY i)',
+            params,
+        )
+
+
+def record_transitions(transitions, now=None):
+    """Log status changes and fold them into the funnel counters.
+
+    ``transitions`` are ``(application_id, job_id, from_status, from_date,
+    to_status)`` tuples; ``from_status`` is blank for new applications and
+    ``from_date`` is when the application entered it. Call inside the
+    transaction that changed the statuses.
+    """
+    if not transitions:
+        return
+    now = now or timezone.now()
+    deltas = FunnelDeltas()
+    # The company dashboard counters (CompanyStats) move along
+    stats = defaultdict(Counter)
+    events = []
+    for application_id, job_id, from_status, from_date, to_status in transitions:
+        deltas.add(job_id, from_status, from_date, to_status, now)
+        stats[job_id][f'applications_{to_status}'] += 1
+        if from_status:
+            stats[job_id][f'applications_{from_status}'] -= 1
+        else:
+            stats[job_id]['total_applications'] += 1
+        events.append(ApplicationEvent(application_id=application_id, from_status=from_status or '',
+                                       to_status=to_status, created=now))
+    with transaction.atomic():
+        ApplicationEvent.objects.bulk_create(events, batch_size=EVENT_BATCH_SIZE)
+        apply_deltas(deltas)
+        CompanyStats.add_for_jobs(stats)
+
+
+def backfill_events(batch_size=5000):
+    """Give applications without any history a reconstructed one: submitted
+    at applied_date, then their current status from status_date"""
+    missing = Application.objects.filter(
+        ~Exists(ApplicationEvent.objects.filter(application=OuterRef('pk')))
+    ).values_list('pk', 'status', 'applied_date', 'status_date')
+    created = 0
+    events = []
+    for application_id, status, applied_date, status_date in missing.iterator(chunk_size=batch_size):
+        if status == 'submitted':
+            events.append(ApplicationEvent(application_id=application_id, to_status=status,
+                                           created=status_date))
+        else:
+            events.append(ApplicationEvent(application_id=application_id, to_status='submitted',
+                                           created=applied_date))
+            events.append(ApplicationEvent(application_id=application_id, from_status='submitted',
+                                           to_status=status, created=status_date))
+        if len(events) >= batch_size:
+            ApplicationEvent.objects.bulk_create(events)
+            created += len(events)
+            events = []
+    ApplicationEvent.objects.bulk_create(events)
+    return created + len(events)
+
+
+def rebuild_funnels(batch_size=5000):
+    """Recompute every JobFunnelStage from the event log; returns the number of stages"""
+    events = ApplicationEvent.objects.order_by('application_id', 'created', 'id').values_list(
+        'application_id', 'application__job_id', 'from_status', 'to_status', 'created',
+    )
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Status changes wait until the counters match the log again
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {ApplicationEvent._meta.db_table} IN SHARE MODE')
+        JobFunnelStage.objects.all().delete()
+        deltas = FunnelDeltas()
+        previous_id = previous_date = None
+        for application_id, job_id, from_status, to_status, created in events.iterator(chunk_size=batch_size):
+            from_date = previous_date if application_id == previous_id else None
+            deltas.add(job_id, from_status, from_date, to_status, created)
+            previous_id, previous_date = application_id, created
+        keys = sorted(deltas)
+        for start in range(0, len(keys), batch_size):
+            batch = FunnelDeltas()
+            batch.update((key, deltas[key]) for key in keys[start:start + batch_size])
+            apply_deltas(batch)
+    return len(deltas)
+
+
+def _format_duration(seconds):
+    if seconds is None:
+        return ''
+    if seconds < 3600:
+        return f'{max(seconds / 60, 1):.0f} min'
+    if seconds < 2 * 86400:
+        return f'{seconds / 3600:.1f} hours'
+    return f'{seconds / 86400:.1f} days'
+
+
+def median_seconds(histogram):
+    """Median stay estimated as the geometric middle of the median bucket"""
+    total = sum(histogram)
+    if not total:
+        return None
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if seen * 2 >= total:
+            return 60 * (2 ** bucket) * (math.sqrt(2) if bucket else 1)
+
+
+def job_funnel(job):
+    """The job's stages in status order with their counters and the mean
+    and median time spent in each"""
+    stages = {stage.status: stage for stage in JobFunnelStage.objects.filter(job=job)}
+    funnel = []
+    for value, label in Application.STATUS_CHOICES:
+        stage = stages.get(value) or JobFunnelStage(job=job, status=value)
+        mean = stage.total_seconds / stage.exited if stage.exited else None
+        funnel.append({
+            'status': value,
+            'label': label,
+            'entered': stage.entered,
+            'current': stage.current,
+            'exited': stage.exited,
+            'mean_time': _format_duration(mean),
+            'median_time': _format_duration(median_seconds(stage.duration_histogram)),
+        })
+    return funnel
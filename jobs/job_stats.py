@@ -0,0 +1,143 @@
+"""
+Per-job daily activity rollups.
+
+Views, applications and saves are appended to ``JobEvent`` as they happen
+(views once per buffer flush, carrying a count). The compact_job_stats
+command folds the raw events into one ``JobDailyStat`` row per job and
+day with a single ``DELETE ... RETURNING`` / ``INSERT ... ON CONFLICT``
+statement per batch, so an event is counted exactly once even when runs
+overlap, and drops rollups older than JOB_STATS_RETENTION_DAYS. Reports
+read the rollups only, so their cost depends on days x jobs, not on
+traffic.
+
+View events also carry a HyperLogLog sketch of their viewers; the batch
+merges them into the day's sketch, so each rollup holds the approximate
+number of distinct viewers in a fixed 2 KB, and any range of days can be
+merged for the distinct viewers over that period.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from .hyperloglog import HyperLogLog, merge
+from .models import JobDailyStat, JobEvent
+
+# Rollup column of each event kind
+COLUMNS = {
+    JobEvent.VIEW: 'views',
+    JobEvent.APPLY: 'applications',
+    JobEvent.SAVE: 'saves',
+}
+
+
+def record_events(kind, counts, viewers=None):
+    """Append ``{job_id: n}`` events of one kind, optionally with
+    ``{job_id: HyperLogLog}`` sketches of who caused them"""
+    viewers = viewers or {}
+    JobEvent.objects.bulk_create([
+        JobEvent(job_id=job_id, kind=kind, count=n,
+                 viewers=viewers[job_id].to_bytes() if job_id in viewers else None)
+        for job_id, n in counts.items() if n
+    ])
+
+
+def record_event(kind, job_id):
+    JobEvent.objects.create(job_id=job_id, kind=kind)
+
+
+def _fold(first_id, last_id):
+    """Move the events with ids in [first_id, last_id] into the rollups"""
+    totals = ', '.join(
+        f"coalesce(sum(count) FILTER (WHERE kind = '{kind}'), 0)" for kind in COLUMNS
+    )
+    columns = ', '.join(COLUMNS.values())
+    updates = ', '.join(f'{column} = stat.{column} + EXCLUDED.{column}' for column in COLUMNS.values())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'WITH moved AS ('
+            f'DELETE FROM {JobEvent._meta.db_table} WHERE id BETWEEN %s AND %s '
+            f'RETURNING job_id, kind, count, created) '
+            f'INSERT INTO {JobDailyStat._meta.db_table} AS stat (job_id, day, {columns}) '
+            f'SELECT job_id, (created AT TIME ZONE %s)::date, {totals} FROM moved '
+            f'GROUP BY 1, 2 ORDER BY 1, 2 '
+            f'ON CONFLICT (job_id, day) DO UPDATE SET {updates}',
+            [first_id, last_id, timezone.get_current_timezone_name()],
+        )
+        return cursor.rowcount
+
+
+def _merge_viewers(sketches):
+    """Merge ``{(job_id, day): HyperLogLog}`` into the (existing) rollups"""
+    if not sketches:
+        return
+    stats = JobDailyStat.objects.filter(
+        job_id__in={job_id for job_id, _ in sketches}, day__in={day for _, day in sketches},
+    ).only('job_id', 'day', 'viewers').order_by('job_id', 'day').select_for_update()
+    changed = []
+    for stat in stats:
+        sketch = sketches.get((stat.job_id, stat.day))
+        if sketch is not None:
+            if stat.viewers:
+                sketch.update(HyperLogLog.from_bytes(stat.viewers))
+            stat.viewers = sketch.to_bytes()
+            changed.append(stat)
+    JobDailyStat.objects.bulk_update(changed, ['viewers'])
+
+
+def compact(batch_size=50000):
+    """Fold all raw events into the daily rollups; returns rollup rows written"""
+    bounds = JobEvent.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return 0
+    written = 0
+    # Events created after this point are left for the next run
+    for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+        last = min(start + batch_size - 1, bounds['last'])
+        with transaction.atomic():
+            # Locked first so an overlapping run skips the sketches this one merges
+            events = JobEvent.objects.filter(
+                id__range=(start, last), viewers__isnull=False,
+            ).values_list('job_id', 'created', 'viewers').select_for_update()
+            sketches = {}
+            for job_id, created, viewers in events:
+                key = job_id, timezone.localtime(created).date()
+                sketch = HyperLogLog.from_bytes(viewers)
+                sketches[key] = sketches[key].update(sketch) if key in sketches else sketch
+            written += _fold(start, last)
+            _merge_viewers(sketches)
+    return written
+
+
+def prune(retention_days=None):
+    """Delete rollups older than the retention window; returns rows deleted"""
+    if retention_days is None:
+        retention_days = settings.JOB_STATS_RETENTION_DAYS
+    cutoff = timezone.localdate() - timedelta(days=retention_days)
+    deleted, _ = JobDailyStat.objects.filter(day__lt=cutoff).delete()
+    return deleted
+
+
+def daily_series(job, days=30):
+    """Chart-ready ``{'labels': [...], 'views': [...], ...}`` for the last
+    ``days`` days, with zeros for days without activity"""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = {
+        row['day']: row
+        for row in JobDailyStat.objects.filter(job=job, day__gte=start).values('day', 'viewers',
+                                                                               *COLUMNS.values())
+    }
+    series = {'labels': [], **{column: [] for column in COLUMNS.values()}, 'unique_viewers': []}
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        series['labels'].append(day.isoformat())
+        for column in COLUMNS.values():
+            series[column].append(rows[day][column] if day in rows else 0)
+        viewers = rows[day]['viewers'] if day in rows else None
+        series['unique_viewers'].append(HyperLogLog.from_bytes(viewers).count() if viewers else 0)
+    # Viewers who came back on several days are counted once here
+    series['total_unique_viewers'] = merge(row['viewers'] for row in rows.values()).count()
+    return series
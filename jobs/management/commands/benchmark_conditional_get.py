@@ -0,0 +1,64 @@
+# jobs/management/commands/benchmark_conditional_get.py
+"""
+Management command measuring what conditional GETs save on repeat polling.
+Run: python manage.py benchmark_conditional_get [--repeat 50]
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+from companies.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Compares bytes and CPU time of full responses with 304 Not Modified on repeat polls'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50, help='Polls per measurement')
+
+    def _poll(self, client, url, repeat, **headers):
+        """(avg bytes, avg CPU ms, status) over ``repeat`` GETs"""
+        sent = 0
+        start = time.process_time()
+        for _ in range(repeat):
+            response = client.get(url, **headers)
+            sent += len(response.content)
+        cpu = (time.process_time() - start) / repeat * 1000
+        return sent / repeat, cpu, response.status_code
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        host = next((h for h in settings.ALLOWED_HOSTS if h and h != '*'), 'localhost')
+        client = Client(SERVER_NAME=host.lstrip('.'))
+
+        urls = [reverse('job_list'), reverse('job_list') + '?sort=salary_high']
+        job = Job.objects.filter(is_listed=True).first()
+        if job:
+            urls.append(reverse('job_detail', args=[job.pk]))
+
+        self.stdout.write(f'Anonymous polls, avg over {repeat} requests')
+        self.stdout.write(f'{"url":<28} {"mode":<10} {"status":>6} {"bytes":>9} {"cpu ms":>8}')
+        for url in urls:
+            with override_settings(ANONYMOUS_PAGE_CACHE_TIMEOUT=0):
+                rendered = self._poll(client, url, repeat)
+            cached = self._poll(client, url, repeat)
+
+            first = client.get(url)
+            headers = {}
+            if first.has_header('ETag'):
+                headers['HTTP_IF_NONE_MATCH'] = first['ETag']
+            conditional = self._poll(client, url, repeat, **headers)
+
+            for mode, (size, cpu, status) in (
+                ('rendered', rendered), ('cached', cached), ('304', conditional),
+            ):
+                self.stdout.write(f'{url:<28} {mode:<10} {status:>6} {size:>9.0f} {cpu:>8.2f}')
+
+            saved = 1 - conditional[0] / rendered[0] if rendered[0] else 0
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {url}: {saved:.0%} fewer bytes, '
+                f'{rendered[1] / max(conditional[1], 0.001):.1f}x less CPU than rendering'
+            ))
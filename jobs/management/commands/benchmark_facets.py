@@ -0,0 +1,43 @@
+# jobs/management/commands/benchmark_facets.py
+"""
+Management command comparing single-pass facet counting with one query per facet.
+Run: python manage.py benchmark_facets [--repeat 20]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from companies.models import Job
+from jobs.facets import FACET_FIELDS, facet_counts
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks facet counting cost as the number of facets grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement')
+
+    def _time(self, func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        jobs = Job.objects.filter(is_listed=True)
+        self.stdout.write(f'Listed jobs: {jobs.count()}  (avg ms over {repeat} runs)')
+        self.stdout.write(f'{"facets":>6}  {"single pass":>12}  {"per facet":>10}')
+
+        for size in range(1, len(FACET_FIELDS) + 1):
+            fields = FACET_FIELDS[:size]
+            single = self._time(lambda: facet_counts(jobs, fields), repeat)
+            per_facet = self._time(
+                lambda: [
+                    list(jobs.order_by().values(field).annotate(count=Count('id')))
+                    for field in fields
+                ],
+                repeat,
+            )
+            self.stdout.write(f'{size:>6}  {single:>12.2f}  {per_facet:>10.2f}')
@@ -0,0 +1,76 @@
+# jobs/management/commands/benchmark_unique_viewers.py
+"""
+Management command comparing HyperLogLog unique viewer counts with exact counting on synthetic views.
+Run: python manage.py benchmark_unique_viewers [--cardinalities 100,10000,1000000] [--precision 11]
+"""
+
+import random
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from jobs.hyperloglog import DEFAULT_PRECISION, HyperLogLog
+
+
+class Command(BaseCommand):
+    help = 'Measures HyperLogLog error, memory and speed against an exact set of viewers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cardinalities', default='100,1000,10000,100000,1000000',
+                            help='Comma-separated numbers of distinct viewers')
+        parser.add_argument('--precision', type=int, default=DEFAULT_PRECISION)
+        parser.add_argument('--views-per-viewer', type=float, default=3.0,
+                            help='Average page loads per viewer (repeat visits, refreshes)')
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Sketches the views are spread over before merging')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _views(self, rng, viewers, per_viewer):
+        """Viewer keys in page-load order; a few viewers reload a lot"""
+        extra = per_viewer - 1
+        for viewer in range(viewers):
+            repeats = 1 + (int(rng.expovariate(1 / extra)) if extra > 0 else 0)
+            yield from [f'user:{viewer}'] * repeats
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        precision = options['precision']
+        workers = options['workers']
+        size = len(HyperLogLog(precision).to_bytes())
+        self.stdout.write(
+            f'Precision {precision}: {size} bytes per sketch, '
+            f'expected standard error {1.04 / (1 << precision) ** 0.5:.2%}'
+        )
+        self.stdout.write(
+            f'{"viewers":>9}  {"views":>9}  {"estimate":>9}  {"error":>7}  '
+            f'{"exact KB":>9}  {"sketch KB":>9}  {"exact us/view":>13}  {"hll us/view":>11}'
+        )
+
+        for viewers in [int(value) for value in options['cardinalities'].split(',')]:
+            views = list(self._views(rng, viewers, options['views_per_viewer']))
+            rng.shuffle(views)
+
+            start = time.perf_counter()
+            exact = set()
+            for key in views:
+                exact.add(key)
+            exact_time = time.perf_counter() - start
+            exact_bytes = sys.getsizeof(exact) + sum(sys.getsizeof(key) for key in exact)
+
+            # Each worker sketches its share of the views; merging must not lose accuracy
+            start = time.perf_counter()
+            sketches = [HyperLogLog(precision) for _ in range(workers)]
+            for index, key in enumerate(views):
+                sketches[index % workers].add(key)
+            hll_time = time.perf_counter() - start
+            merged = HyperLogLog(precision)
+            for sketch in sketches:
+                merged.update(HyperLogLog.from_bytes(sketch.to_bytes()))
+
+            estimate = merged.count()
+            error = (estimate - len(exact)) / len(exact)
+            self.stdout.write(
+                f'{len(exact):>9}  {len(views):>9}  {estimate:>9}  {error:>+7.2%}  '
+                f'{exact_bytes / 1024:>9.0f}  {size / 1024:>9.1f}  '
+                f'{exact_time / len(views) * 1e6:>13.2f}  {hll_time / len(views) * 1e6:>11.2f}'
+            )
@@ -0,0 +1,27 @@
+# jobs/management/commands/compact_job_stats.py
+"""
+Management command to fold raw job activity events into daily per-job rollups.
+Run: python manage.py compact_job_stats [--batch-size 50000] [--retention-days 365]
+Schedule it every few minutes; job stats reports only read the rollups.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from jobs.job_stats import compact, prune
+
+
+class Command(BaseCommand):
+    help = 'Folds JobEvent rows into JobDailyStat and drops rollups past the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50000, help='Events folded per transaction')
+        parser.add_argument('--retention-days', type=int, default=settings.JOB_STATS_RETENTION_DAYS,
+                            help='Days of rollups to keep')
+
+    def handle(self, *args, **options):
+        written = compact(options['batch_size'])
+        deleted = prune(options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Updated {written} daily rollup(s), pruned {deleted} older than '
+            f'{options["retention_days"]} day(s)'
+        ))
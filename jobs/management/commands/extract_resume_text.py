@@ -0,0 +1,48 @@
+# jobs/management/commands/extract_resume_text.py
+"""
+Management command to extract resume text for applicant search.
+Run: python manage.py extract_resume_text [--enqueue-existing] [--workers 4] [--batch-size 100] [--timeout 60]
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from jobs.models import ResumeText
+from jobs.resume_text import enqueue_existing, process_queue
+
+
+class Command(BaseCommand):
+    help = 'Extracts text from queued resume PDFs in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enqueue-existing', action='store_true',
+                            help='First queue application resumes that were never extracted')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (default: one per CPU)')
+        parser.add_argument('--batch-size', type=int, default=100, help='Files claimed per batch')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many files')
+        parser.add_argument('--stale-after', type=int, default=30,
+                            help='Minutes after which unfinished claims are requeued')
+        parser.add_argument('--timeout', type=int, default=60,
+                            help='Seconds a single file may take before it counts as failed')
+
+    def handle(self, *args, **options):
+        if options['enqueue_existing']:
+            queued = enqueue_existing()
+            self.stdout.write(self.style.SUCCESS(f'✓ Queued {queued} existing resume(s)'))
+
+        pending = ResumeText.objects.filter(status='pending').count()
+        self.stdout.write(f'Pending: {pending}')
+
+        def progress(extracted, failed):
+            self.stdout.write(f'  extracted {extracted}, failed {failed}')
+
+        extracted, failed = process_queue(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+            stale_after=timedelta(minutes=options['stale_after']),
+            task_timeout=options['timeout'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ Extracted {extracted} resume(s), {failed} failure(s)'))
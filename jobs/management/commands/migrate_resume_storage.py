@@ -0,0 +1,87 @@
+# jobs/management/commands/migrate_resume_storage.py
+"""
+Management command to move resumes from the flat upload directories into
+content-addressed storage.
+Run: python manage.py migrate_resume_storage [--keep-originals] [--recount]
+"""
+
+from collections import Counter
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from jobs.models import StoredBlob
+from jobs.storage import content_storage, is_blob_name
+
+
+class Command(BaseCommand):
+    help = 'Migrates existing resume files to content-addressed storage and deduplicates them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-originals', action='store_true',
+                            help='Leave the old files in place after migrating')
+        parser.add_argument('--recount', action='store_true',
+                            help='Rebuild blob reference counts from the database and drop orphans')
+
+    def handle(self, *args, **options):
+        migrated, missing, originals = 0, 0, set()
+
+        for label, field in StoredBlob.REFERENCES:
+            model = apps.get_model(label)
+            rows = model.objects.exclude(**{field: ''}).exclude(
+                **{f'{field}__startswith': 'blobs/'}
+            ).values_list('pk', field)
+            for pk, old_name in rows.iterator():
+                if not content_storage.exists(old_name):
+                    self.stdout.write(self.style.WARNING(f'  missing: {old_name} ({label} {pk})'))
+                    missing += 1
+                    continue
+                # The blob lock taken by save() lasts until the reference is recorded
+                with transaction.atomic(), content_storage.open(old_name) as old_file:
+                    new_name = content_storage.save(old_name, old_file)
+                    # Queryset update: the reference is counted here, not by signals
+                    model.objects.filter(pk=pk).update(**{field: new_name})
+                    StoredBlob.acquire(new_name)
+                originals.add(old_name)
+                migrated += 1
+
+        if not options['keep_originals']:
+            for name in originals:
+                content_storage.delete(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Migrated {migrated} resume(s) into {StoredBlob.objects.count()} blob(s); '
+            f'{missing} file(s) missing'
+        ))
+
+        if options['recount']:
+            self.recount()
+
+    def recount(self):
+        """Make every StoredBlob.ref_count match the rows that use it"""
+        counts = Counter()
+        for label, field in StoredBlob.REFERENCES:
+            names = apps.get_model(label).objects.filter(
+                **{f'{field}__startswith': 'blobs/'}
+            ).values_list(field, flat=True)
+            counts.update(name for name in names.iterator() if is_blob_name(name))
+
+        fixed = 0
+        with transaction.atomic():
+            for blob in StoredBlob.objects.select_for_update():
+                if counts.get(blob.name, 0) != blob.ref_count:
+                    blob.ref_count = counts.get(blob.name, 0)
+                    blob.save(update_fields=['ref_count'])
+                    fixed += 1
+                counts.pop(blob.name, None)
+            StoredBlob.objects.bulk_create(
+                [StoredBlob(name=name, ref_count=count) for name, count in counts.items()]
+            )
+            orphans = list(StoredBlob.objects.filter(ref_count=0).values_list('name', flat=True))
+            StoredBlob.objects.filter(ref_count=0).delete()
+        for name in orphans:
+            content_storage.delete(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Recounted: {fixed} corrected, {len(counts)} added, {len(orphans)} orphan(s) removed'
+        ))
@@ -0,0 +1,29 @@
+# jobs/management/commands/rebuild_application_funnel.py
+"""
+Management command to backfill application status history and recompute the job funnels.
+Run: python manage.py rebuild_application_funnel [--no-backfill]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from jobs.funnel import backfill_events, rebuild_funnels
+
+
+class Command(BaseCommand):
+    help = 'Backfills ApplicationEvent history and rebuilds JobFunnelStage from it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-backfill', action='store_true',
+                            help='Only recompute the funnels from the existing events')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if not options['no_backfill']:
+            created = backfill_events(options['batch_size'])
+            self.stdout.write(f'Backfilled {created} event(s)')
+        stages = rebuild_funnels(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Rebuilt {stages} funnel stage(s) in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,42 @@
+# jobs/management/commands/rebuild_match_vectors.py
+"""
+Management command to (re)build the matching vectors of all jobs and job seekers.
+Run: python manage.py rebuild_match_vectors [--batch-size 1000]
+"""
+
+from django.core.management.base import BaseCommand
+from companies.models import Job
+from jobs.matching import job_terms, seeker_terms, store_vectors
+from jobs.models import JobSeeker, MatchVector
+
+
+class Command(BaseCommand):
+    help = 'Builds matching vectors for existing jobs and job seeker profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows upserted per statement')
+
+    def _rebuild(self, queryset, kind, key, terms, batch_size):
+        total, batch = 0, []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            batch.append((key(obj), terms(obj)))
+            if len(batch) >= batch_size:
+                store_vectors(kind, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            store_vectors(kind, batch)
+            total += len(batch)
+        return total
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        jobs = self._rebuild(
+            Job.objects.only('title', 'category', 'requirements', 'description'),
+            MatchVector.JOB, lambda job: job.pk, job_terms, batch_size,
+        )
+        seekers = self._rebuild(
+            JobSeeker.objects.only('user_id', 'skills', 'experience', 'education'),
+            MatchVector.SEEKER, lambda seeker: seeker.user_id, seeker_terms, batch_size,
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ Built vectors for {jobs} job(s) and {seekers} job seeker(s)'))
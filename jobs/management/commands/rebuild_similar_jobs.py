@@ -0,0 +1,30 @@
+# jobs/management/commands/rebuild_similar_jobs.py
+"""
+Management command to rebuild the "people who applied also applied to" table.
+Run: python manage.py rebuild_similar_jobs [--top-k 10] [--memory-mb 256]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.recommender import rebuild_similar_jobs
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds SimilarJob from application and saved job co-occurrence'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=10, help='Neighbours kept per job')
+        parser.add_argument('--memory-mb', type=int, default=256,
+                            help='Memory cap for the whole rebuild; interactions are staged '
+                                 'in the database and streamed in chunks that fit')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            jobs, rows = rebuild_similar_jobs(k=options['top_k'], memory_mb=options['memory_mb'])
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Stored {rows} neighbour(s) for {jobs} job(s) in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,24 @@
+# jobs/management/commands/search_cache_stats.py
+"""
+Management command to report job search cache hits and misses.
+Run: python manage.py search_cache_stats [--reset]
+"""
+
+from django.core.management.base import BaseCommand
+from jobs.search_cache import reset_search_cache_stats, search_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Shows hit/miss counters for the job search result cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing')
+
+    def handle(self, *args, **options):
+        stats = search_cache_stats()
+        self.stdout.write(f'Hits:      {stats["hits"]}')
+        self.stdout.write(f'Misses:    {stats["misses"]}')
+        self.stdout.write(f'Hit ratio: {stats["hit_ratio"]:.1%}')
+        if options['reset']:
+            reset_search_cache_stats()
+            self.stdout.write(self.style.SUCCESS('✓ Counters reset'))
@@ -0,0 +1,339 @@
+"""
+Candidate/job matching on TF-IDF vectors.
+
+Job and job seeker texts are tokenized into unigrams and bigrams and
+hashed into ``FEATURES`` buckets (the hashing trick), so no vocabulary
+has to be kept in sync. The hashed term counts are stored per object in
+``MatchVector`` and refreshed by signals whenever a job or profile is
+saved. At query time the counts get sublinear TF and IDF weights (IDF
+from the listed job corpus) and L2 normalization, so a sparse matrix
+product gives cosine similarities for many rows at once.
+"""
+
+import re
+import threading
+import zlib
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+from scipy import sparse
+from companies.models import Job
+from .models import MatchVector
+from .search_cache import get_generation
+
+FEATURES = 2 ** 18
+
+TOKEN = re.compile(r'[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]')
+STOP_WORDS = frozenset('''
+    a an and are as at be but by for from has have in is it its of on or our
+    that the their this to was we were will with you your etc e.g i.e able
+    experience experienced work working years year strong good knowledge
+'''.split())
+
+# Rows changed shortly before the last refresh are fetched again, so
+# transactions that committed late are not missed
+REFRESH_OVERLAP = timedelta(seconds=5)
+# Share of the job index that may change before it is rebuilt with a fresh IDF
+REBUILD_FRACTION = 0.1
+
+
+def tokenize(text):
+    words = [
+        word.strip('.') for word in TOKEN.findall((text or '').lower())
+        if word.strip('.') not in STOP_WORDS
+    ]
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+def hash_terms(*texts):
+    """Hashed term counts of the texts as (int32 indices, float32 counts)"""
+    buckets = np.fromiter(
+        (zlib.crc32(term.encode()) % FEATURES for text in texts for term in tokenize(text)),
+        dtype=np.int32,
+    )
+    indices, counts = np.unique(buckets, return_counts=True)
+    return indices.astype(np.int32), counts.astype(np.float32)
+
+
+def job_terms(job):
+    # Title and requirements say most about the role
+    return hash_terms(job.title, job.title, job.category, job.requirements,
+                      job.requirements, job.description)
+
+
+def seeker_terms(seeker):
+    return hash_terms(seeker.skills, seeker.skills, seeker.experience, seeker.education)
+
+
+def store_vectors(kind, items):
+    """Upsert ``[(object_id, (indices, counts))]`` in one statement"""
+    MatchVector.objects.bulk_create(
+        [
+            MatchVector(kind=kind, object_id=object_id,
+                        terms=indices.tobytes(), counts=counts.tobytes())
+            for object_id, (indices, counts) in items
+        ],
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['terms', 'counts', 'updated_at'],
+    )
+
+
+def update_job_vector(job):
+    store_vectors(MatchVector.JOB, [(job.pk, job_terms(job))])
+
+
+def update_seeker_vector(seeker):
+    # Seekers are keyed by user id, like Application.applicant
+    store_vectors(MatchVector.SEEKER, [(seeker.user_id, seeker_terms(seeker))])
+
+
+def _decode(vector):
+    return (
+        np.frombuffer(bytes(vector.terms), dtype=np.int32),
+        np.frombuffer(bytes(vector.counts), dtype=np.float32),
+    )
+
+
+def load_vectors(kind, object_ids):
+    """{object_id: (indices, counts)} for the given objects"""
+    vectors = MatchVector.objects.filter(kind=kind, object_id__in=list(object_ids))
+    return {vector.object_id: _decode(vector) for vector in vectors}
+
+
+def to_matrix(rows):
+    """CSR matrix (len(rows) x FEATURES) of sublinear term frequencies"""
+    lengths = [len(indices) for indices, _ in rows]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.concatenate([i for i, _ in rows]) if rows else np.zeros(0, dtype=np.int32)
+    counts = np.concatenate([c for _, c in rows]) if rows else np.zeros(0, dtype=np.float32)
+    return sparse.csr_matrix(
+        (1 + np.log(counts, dtype=np.float32), indices, indptr),
+        shape=(len(rows), FEATURES),
+    )
+
+
+def idf_weights(matrix):
+    """Smoothed IDF per feature from a corpus matrix"""
+    df = np.bincount(matrix.indices, minlength=FEATURES)
+    return (np.log((1 + matrix.shape[0]) / (1 + df)) + 1).astype(np.float32)
+
+
+def weigh(matrix, idf):
+    """Apply IDF and L2-normalize every row"""
+    weighted = matrix.astype(np.float32, copy=True)
+    weighted.data *= idf[weighted.indices]
+    row_lengths = np.diff(weighted.indptr)
+    rows = np.repeat(np.arange(weighted.shape[0]), row_lengths)
+    norms = np.sqrt(np.bincount(rows, weights=weighted.data ** 2, minlength=weighted.shape[0]))
+    norms[norms == 0] = 1
+    weighted.data /= np.repeat(norms, row_lengths).astype(np.float32)
+    return weighted
+
+
+def top_k(left, right, k, batch_size=64, exclude_self=False):
+    """Best ``k`` rows of ``right`` for every row of ``left`` by dot product.
+
+    Rows of ``left`` are scored in batches against all of ``right`` with
+    one sparse product per batch, so memory stays at
+    ``batch_size x right rows``. Yields ``(left_row, right_rows, scores)``
+    with the best match first; zero scores are dropped.
+    """
+    right_t = right.T.tocsc()
+    for start in range(0, left.shape[0], batch_size):
+        scores = (left[start:start + batch_size] @ right_t).toarray()
+        if exclude_self:
+            rows = np.arange(scores.shape[0])
+            scores[rows, rows + start] = 0
+        count = min(k, scores.shape[1])
+        best = np.argpartition(-scores, count - 1, axis=1)[:, :count] if count else \
+            np.zeros((scores.shape[0], 0), dtype=np.int64)
+        for offset, candidates in enumerate(best):
+            row_scores = scores[offset, candidates]
+            order = np.argsort(-row_scores)
+            candidates, row_scores = candidates[order], row_scores[order]
+            keep = row_scores > 0
+            yield start + offset, candidates[keep], row_scores[keep]
+
+
+class JobIndexSnapshot(namedtuple('JobIndexSnapshot', ['ids', 'blocks', 'live', 'idf'])):
+    """One generation of the job index: weighted CSR ``blocks`` whose rows,
+    stacked, belong to the jobs in ``ids``. ``live`` is False for rows
+    replaced or unlisted since their block was built. Never mutated:
+    refreshes publish a new snapshot, so readers always pair ids with their
+    own rows."""
+    __slots__ = ()
+
+    def vectorize(self, rows):
+        """Weighted matrix for outside rows, using the job corpus IDF"""
+        return weigh(to_matrix(rows), self.idf)
+
+    def scores(self, vectors):
+        """(jobs x vectors) dot products with weighted ``vectors``; 0 for
+        dead rows"""
+        scores = np.vstack([(block @ vectors.T).toarray() for block in self.blocks])
+        scores[~self.live] = 0
+        return scores
+
+
+EMPTY_SNAPSHOT = JobIndexSnapshot(np.zeros(0, dtype=np.int64), [to_matrix([])], np.zeros(0, dtype=bool),
+                                  np.ones(FEATURES, dtype=np.float32))
+
+
+class JobIndex:
+    """Listed jobs as weighted CSR blocks, kept in memory per process.
+
+    ``snapshot()`` is cheap when nothing changed: it compares the listings
+    generation, then reads only the jobs and vectors updated since the last
+    refresh. Changed jobs are appended as a new block weighed with the
+    current IDF and the rows they replace are masked out; trailing blocks
+    of similar size are merged, so a job save costs about its own rows.
+    Once REBUILD_FRACTION of the index has changed, the listed set is
+    reloaded and everything is rebuilt into one block with a fresh IDF.
+    Deleted jobs leave the index then; until that, callers drop them when
+    hydrating. Term vectors are cached for listed jobs only.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        # Listed job id -> its live row in the snapshot
+        self.positions = {}
+        self.changes = 0
+        self.generation = None
+        self.loaded_at = None
+        self._snapshot = EMPTY_SNAPSHOT
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """The current JobIndexSnapshot, refreshed first if listings changed"""
+        if get_generation() != self.generation:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self):
+        generation = get_generation()
+        with self._lock:
+            if generation == self.generation:
+                return
+            started = timezone.now()
+            if self.loaded_at is None:
+                self._rebuild()
+            else:
+                self._apply(*self._changes_since(self.loaded_at - REFRESH_OVERLAP))
+                if self.changes > REBUILD_FRACTION * len(self.rows):
+                    self._rebuild()
+            self.loaded_at = started
+            self.generation = generation
+
+    def _changes_since(self, since):
+        """({job_id: row} to add or replace, {job_id} to drop) since ``since``"""
+        listed, unlisted = set(), set()
+        for job_id, is_listed in Job.objects.filter(updated_at__gte=since).values_list('id', 'is_listed'):
+            (listed if is_listed else unlisted).add(job_id)
+        vectors = MatchVector.objects.filter(kind=MatchVector.JOB, updated_at__gte=since)
+        rows = {vector.object_id: _decode(vector) for vector in vectors.iterator(chunk_size=2000)}
+        # Relisted jobs whose vectors were evicted while unlisted
+        rows.update(load_vectors(MatchVector.JOB, listed - self.rows.keys() - rows.keys()))
+
+        changed = {}
+        for job_id, row in rows.items():
+            if job_id in unlisted or (job_id not in listed and job_id not in self.rows):
+                continue
+            old = self.rows.get(job_id)
+            # The overlap refetches rows already seen; only new content counts
+            if old is None or not (np.array_equal(row[0], old[0]) and np.array_equal(row[1], old[1])):
+                changed[job_id] = row
+        return changed, unlisted & self.rows.keys()
+
+    def _apply(self, changed, removed):
+        """Mask out the rows of ``changed`` and ``removed`` jobs and append
+        ``changed`` as a new block"""
+        if not changed and not removed:
+            return
+        snapshot = self._snapshot
+        live = snapshot.live.copy()
+        for job_id in removed | changed.keys():
+            position = self.positions.pop(job_id, None)
+            if position is not None:
+                live[position] = False
+            self.rows.pop(job_id, None)
+
+        ids, blocks = snapshot.ids, list(snapshot.blocks)
+        if changed:
+            new_ids = sorted(changed)
+            self.positions.update((job_id, len(ids) + i) for i, job_id in enumerate(new_ids))
+            self.rows.update(changed)
+            blocks.append(snapshot.vectorize([changed[job_id] for job_id in new_ids]))
+            ids = np.concatenate([ids, np.array(new_ids, dtype=np.int64)])
+            live = np.concatenate([live, np.ones(len(new_ids), dtype=bool)])
+            # Each block after the first is under half the size of the one
+            # before it, so there are O(log n) and rows are copied O(log n) times
+            while len(blocks) > 2 and blocks[-2].shape[0] <= 2 * blocks[-1].shape[0]:
+                last = blocks.pop()
+                blocks[-1] = sparse.vstack([blocks[-1], last], format='csr')
+        self.changes += len(changed) + len(removed)
+        self._snapshot = JobIndexSnapshot(ids, blocks, live, snapshot.idf)
+
+    def _rebuild(self):
+        """Reload the listed set and rebuild one block with a fresh IDF"""
+        listed = set(Job.objects.filter(is_listed=True).values_list('id', flat=True))
+        rows = {job_id: self.rows[job_id] for job_id in listed if job_id in self.rows}
+        rows.update(load_vectors(MatchVector.JOB, listed - rows.keys()))
+        ids = sorted(rows)
+        tf = to_matrix([rows[job_id] for job_id in ids])
+        idf = idf_weights(tf)
+        self.rows = rows
+        self.positions = {job_id: i for i, job_id in enumerate(ids)}
+        self.changes = 0
+        self._snapshot = JobIndexSnapshot(np.array(ids, dtype=np.int64), [weigh(tf, idf)],
+                                          np.ones(len(ids), dtype=bool), idf)
+
+
+job_index = JobIndex()
+
+
+def recommended_jobs(user, limit=10, exclude=()):
+    """Listed jobs best matching a seeker's profile, best first.
+
+    Each job carries its cosine similarity as ``match_score``.
+    """
+    seeker = load_vectors(MatchVector.SEEKER, [user.pk]).get(user.pk)
+    if seeker is None or not len(seeker[0]):
+        return []
+    index = job_index.snapshot()
+    if not index.live.any():
+        return []
+
+    scores = index.scores(index.vectorize([seeker])).ravel()
+    if exclude:
+        scores[np.isin(index.ids, list(exclude))] = 0
+    count = min(limit, len(scores))
+    best = np.argpartition(-scores, count - 1)[:count]
+    best = [i for i in best[np.argsort(-scores[best])] if scores[i] > 0]
+
+    # Jobs deleted since the index was rebuilt are still in it
+    jobs = Job.objects.filter(
+        pk__in=index.ids[best].tolist(), is_listed=True
+    ).select_related('company').in_bulk()
+    ranked = []
+    for i in best:
+        job = jobs.get(int(index.ids[i]))
+        if job is not None:
+            job.match_score = float(scores[i])
+            ranked.append(job)
+    return ranked
+
+
+def candidate_scores(job, user_ids):
+    """{user_id: cosine similarity} of seekers' profiles to a job"""
+    seekers = load_vectors(MatchVector.SEEKER, user_ids)
+    if not seekers:
+        return {}
+    index = job_index.snapshot()
+    ids = list(seekers)
+    job_vector = index.vectorize([job_terms(job)])
+    scores = (index.vectorize([seekers[user_id] for user_id in ids]) @ job_vector.T).toarray().ravel()
+    return dict(zip(ids, scores.tolist()))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 17:01
+
+from django.db import migrations, models
+import jobs.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'stored_blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='resume',
+            field=models.FileField(storage=jobs.storage.ContentAddressedStorage(), upload_to='application_resumes/'),
+        ),
+        migrations.AlterField(
+            model_name='jobseeker',
+            name='resume',
+            field=models.FileField(blank=True, storage=jobs.storage.ContentAddressedStorage(), upload_to='resumes/'),
+        ),
+    ]
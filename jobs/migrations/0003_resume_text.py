@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-18 17:03
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_content_addressed_resumes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('text', models.TextField(blank=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('extracted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'resume_texts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('cover_letter', config='english'), name='applications_cover_letter_fts'),
+        ),
+        migrations.AddIndex(
+            model_name='resumetext',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='resume_texts_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='resumetext',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='resume_texts_pending_idx'),
+        ),
+    ]
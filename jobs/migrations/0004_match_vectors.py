@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_resume_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchVector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('job', 'Job'), ('seeker', 'Job Seeker')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('terms', models.BinaryField()),
+                ('counts', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'match_vectors',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='matchvector',
+            index=models.Index(fields=['kind', 'updated_at'], name='match_vectors_updated_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='matchvector',
+            unique_together={('kind', 'object_id')},
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-18 17:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_updated_at'),
+        ('jobs', '0004_match_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.job')),
+                ('similar_job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.job')),
+            ],
+            options={
+                'db_table': 'similar_jobs',
+                'ordering': ['job', 'rank'],
+                'unique_together': {('job', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_similar_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'status', 'applied_date', 'id'], name='applications_job_status_date'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'applied_date', 'id'], name='applications_job_date'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['applied_date', 'id'], name='applications_applied_date'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2 on 2026-10-18 17:18
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_status_date(apps, schema_editor):
+    Application = apps.get_model('jobs', 'Application')
+    # Best known time of the last status change
+    Application.objects.update(status_date=models.Case(
+        models.When(status='submitted', then=models.F('applied_date')),
+        default=models.F('updated_date'),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_updated_at'),
+        ('jobs', '0006_application_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='status_date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name='ApplicationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=30)),
+                ('to_status', models.CharField(max_length=30)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('application', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='jobs.application')),
+            ],
+            options={
+                'db_table': 'application_events',
+                'ordering': ['application', 'created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobFunnelStage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=30)),
+                ('entered', models.PositiveIntegerField(default=0)),
+                ('current', models.IntegerField(default=0)),
+                ('exited', models.PositiveIntegerField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+                ('duration_histogram', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=24)),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='funnel_stages', to='companies.job')),
+            ],
+            options={
+                'db_table': 'job_funnel_stages',
+                'unique_together': {('job', 'status')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='applicationevent',
+            index=models.Index(fields=['application', 'created'], name='application_events_timeline'),
+        ),
+        migrations.RunPython(backfill_status_date, migrations.RunPython.noop),
+    ]
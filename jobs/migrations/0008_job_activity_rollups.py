@@ -0,0 +1,51 @@
+# Generated by Django 4.2 on 2026-10-18 17:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_company_stats'),
+        ('jobs', '0007_application_status_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('view', 'View'), ('apply', 'Application'), ('save', 'Save')], max_length=10)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.job')),
+            ],
+            options={
+                'db_table': 'job_events',
+            },
+        ),
+        migrations.CreateModel(
+            name='JobDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('applications', models.PositiveIntegerField(default=0)),
+                ('saves', models.PositiveIntegerField(default=0)),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='companies.job')),
+            ],
+            options={
+                'db_table': 'job_daily_stats',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='jobdailystat',
+            index=models.Index(fields=['day'], name='job_daily_stats_day_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobdailystat',
+            unique_together={('job', 'day')},
+        ),
+    ]
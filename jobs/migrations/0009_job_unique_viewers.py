@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_job_activity_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdailystat',
+            name='viewers',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='jobevent',
+            name='viewers',
+            field=models.BinaryField(null=True),
+        ),
+    ]
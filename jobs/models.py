@@ -1,6 +1,12 @@
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import IntegrityError, connections, models, router, transaction
+from django.utils import timezone
 from accounts.models import User
-from companies.models import Job
+from companies.models import SEARCH_CONFIG, Job
+from .hyperloglog import HyperLogLog
+from .storage import content_storage, is_blob_name, lock_blob
 
 class JobSeeker(models.Model):
     """Job Seeker Profile"""
@@ -10,7 +16,7 @@ class JobSeeker(models.Model):
     phone = models.CharField(max_length=20)
     address = models.TextField()
     city = models.CharField(max_length=100)
-    resume = models.FileField(upload_to='resumes/', blank=True)
+    resume = models.FileField(upload_to='resumes/', storage=content_storage, blank=True)
     skills = models.TextField(blank=True)
     education = models.TextField(blank=True)
     experience = models.TextField(blank=True)
@@ -21,6 +27,11 @@ class JobSeeker(models.Model):
     
     def __str__(self):
         return self.full_name
+    
+    def save(self, *args, **kwargs):
+        # The resume blob and its StoredBlob reference are written together
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Application(models.Model):
@@ -36,20 +47,93 @@ class Application(models.Model):
     
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     applicant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='applications')
-    resume = models.FileField(upload_to='application_resumes/')
+    resume = models.FileField(upload_to='application_resumes/', storage=content_storage)
     cover_letter = models.TextField()
     status = models.CharField(max_length=30, choices=STATUS_CHOICES, default='submitted')
     applied_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
+    # When the application entered its current status
+    status_date = models.DateTimeField(default=timezone.now)
     notes = models.TextField(blank=True)
     
     class Meta:
         db_table = 'applications'
         unique_together = ('job', 'applicant')
         ordering = ['-applied_date']
+        indexes = [
+            # Serves SearchVector('cover_letter', config=SEARCH_CONFIG) lookups
+            GinIndex(SearchVector('cover_letter', config=SEARCH_CONFIG),
+                     name='applications_cover_letter_fts'),
+            # Keyset pages of the company inbox: (applied_date, id) within
+            # a job and status, within a job, and across a company's jobs
+            models.Index(fields=['job', 'status', 'applied_date', 'id'],
+                         name='applications_job_status_date'),
+            models.Index(fields=['job', 'applied_date', 'id'], name='applications_job_date'),
+            models.Index(fields=['applied_date', 'id'], name='applications_applied_date'),
+        ]
     
     def __str__(self):
         return f"{self.applicant.username} - {self.job.title}"
+    
+    def save(self, *args, **kwargs):
+        # Status events and funnel counters are written by the save signals,
+        # in the same transaction as the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def submit(self):
+        """Insert a new application in one statement; False if the applicant
+        already applied for the job.
+
+        ``INSERT ... ON CONFLICT (job_id, applicant_id) DO NOTHING`` waits for
+        a concurrent insert of the same pair to finish instead of raising, so
+        double submissions need neither a pre-check nor an IntegrityError
+        handler. The insert sends no save signals: the bookkeeping their
+        receivers do for a new application is done here, in the same
+        transaction.
+        """
+        # Imported here: these modules import the models
+        from .funnel import record_transitions
+        from .job_stats import record_event
+        from .user_jobs import invalidate_user_job_ids
+    
+        using = router.db_for_write(Application, instance=self)
+        connection = connections[using]
+        fields = [field for field in self._meta.local_concrete_fields if not field.primary_key]
+        with transaction.atomic(using=using):
+            self.status_date = timezone.now()
+            # pre_save() stores the upload and fills applied_date/updated_date
+            values = [field.get_db_prep_save(field.pre_save(self, True), connection) for field in fields]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {connection.ops.quote_name(self._meta.db_table)} '
+                    f'({", ".join(connection.ops.quote_name(field.column) for field in fields)}) '
+                    f'VALUES ({", ".join(["%s"] * len(fields))}) '
+                    f'ON CONFLICT (job_id, applicant_id) DO NOTHING RETURNING id',
+                    values,
+                )
+                row = cursor.fetchone()
+            if row is None:
+                self._discard_resume()
+                return False
+            self.pk = row[0]
+            self._state.adding = False
+            self._state.db = using
+    
+            StoredBlob.acquire(self.resume.name)
+            # Text is extracted in the background (extract_resume_text)
+            ResumeText.enqueue([self.resume.name])
+            record_transitions([(self.pk, self.job_id, '', None, self.status)], self.status_date)
+            record_event(JobEvent.APPLY, self.job_id)
+            applicant_id = self.applicant_id
+            transaction.on_commit(lambda: invalidate_user_job_ids(applicant_id), using=using)
+        return True
+    
+    def _discard_resume(self):
+        # The losing upload was already written; drop it unless another row uses it
+        name = self.resume.name
+        if is_blob_name(name):
+            transaction.on_commit(lambda: StoredBlob.delete_if_unreferenced(name))
 
 
 class SavedJob(models.Model):
@@ -64,3 +148,253 @@ class SavedJob(models.Model):
     
     def __str__(self):
         return f"{self.user.username} saved {self.job.title}"
+
+
+class StoredBlob(models.Model):
+    """Reference count of a content-addressed file (see jobs/storage.py)"""
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    # (model, field) pairs whose files live in content_storage
+    REFERENCES = (('jobs.JobSeeker', 'resume'), ('jobs.Application', 'resume'))
+    
+    class Meta:
+        db_table = 'stored_blobs'
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+    
+    @classmethod
+    def acquire(cls, name):
+        """Record one more reference to a blob"""
+        if not is_blob_name(name):
+            return
+        with transaction.atomic():
+            # Until commit, delete_if_unreferenced() of this blob waits for us
+            lock_blob(name)
+            if cls.objects.filter(name=name).update(ref_count=models.F('ref_count') + 1):
+                return
+            try:
+                with transaction.atomic():
+                    cls.objects.create(name=name, ref_count=1)
+            except IntegrityError:
+                # Created concurrently (only without the lock, off PostgreSQL)
+                cls.objects.filter(name=name).update(ref_count=models.F('ref_count') + 1)
+    
+    @classmethod
+    def release(cls, name):
+        """Drop one reference; the file is deleted with its last reference"""
+        if not is_blob_name(name):
+            return
+        with transaction.atomic():
+            lock_blob(name)
+            cls.objects.filter(name=name, ref_count__gt=0).update(ref_count=models.F('ref_count') - 1)
+            deleted, _ = cls.objects.filter(name=name, ref_count=0).delete()
+        if deleted:
+            transaction.on_commit(lambda: cls.delete_if_unreferenced(name))
+    
+    @classmethod
+    def delete_if_unreferenced(cls, name):
+        """Delete the file unless a reference to it was recorded meanwhile;
+        run after the commit that dropped the last reference"""
+        with transaction.atomic():
+            # Waits for uncommitted writers of the same content; the file
+            # is removed while holding the lock so none can adopt it midway
+            lock_blob(name)
+            if not cls.objects.filter(name=name).exists():
+                content_storage.delete(name)
+                ResumeText.objects.filter(name=name).delete()
+
+
+class ResumeText(models.Model):
+    """Text extracted from a stored resume file, for applicant search.
+
+    One row per file, so a PDF shared by several applications is only
+    extracted once. Pending rows double as the work queue of the
+    extract_resume_text command.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    
+    name = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    text = models.TextField(blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    extracted_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'resume_texts'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='resume_texts_search_gin'),
+            models.Index(fields=['id'], name='resume_texts_pending_idx',
+                         condition=models.Q(status='pending')),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+    
+    @classmethod
+    def enqueue(cls, names):
+        """Queue files for extraction; files already known are left alone"""
+        return cls.objects.bulk_create(
+            [cls(name=name) for name in names if name],
+            ignore_conflicts=True,
+        )
+
+
+class MatchVector(models.Model):
+    """Hashed term counts of a job or job seeker profile (see jobs/matching.py)"""
+    JOB = 'job'
+    SEEKER = 'seeker'
+    KIND_CHOICES = (
+        (JOB, 'Job'),
+        (SEEKER, 'Job Seeker'),
+    )
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Job pk, or the user id of a job seeker
+    object_id = models.BigIntegerField()
+    terms = models.BinaryField()   # int32 feature indices
+    counts = models.BinaryField()  # float32 term counts
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'match_vectors'
+        unique_together = ('kind', 'object_id')
+        indexes = [
+            models.Index(fields=['kind', 'updated_at'], name='match_vectors_updated_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class SimilarJob(models.Model):
+    """Top-K co-occurrence neighbours of a job, rebuilt offline by the
+    rebuild_similar_jobs command"""
+    # Covered by the (job, rank) unique index
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+', db_index=False)
+    similar_job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    
+    class Meta:
+        db_table = 'similar_jobs'
+        unique_together = ('job', 'rank')
+        ordering = ['job', 'rank']
+    
+    def __str__(self):
+        return f"{self.job_id} -> {self.similar_job_id} (#{self.rank})"
+
+
+class ApplicationEvent(models.Model):
+    """Append-only log of application status changes (see jobs/funnel.py)"""
+    # Covered by the (application, created) index
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='events',
+                                    db_index=False)
+    # Blank for the event that created the application
+    from_status = models.CharField(max_length=30, blank=True)
+    to_status = models.CharField(max_length=30)
+    created = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'application_events'
+        ordering = ['application', 'created']
+        indexes = [
+            models.Index(fields=['application', 'created'], name='application_events_timeline'),
+        ]
+    
+    def __str__(self):
+        return f"{self.application_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+class JobFunnelStage(models.Model):
+    """Running funnel counters of one application status of one job.
+
+    Updated incrementally with every status change, so a job's funnel is
+    read from one row per stage however many applications it has.
+    """
+    # Bucket i counts stays of 2**i to 2**(i + 1) minutes (bucket 0: under 2)
+    HISTOGRAM_BUCKETS = 24
+    
+    # Covered by the (job, status) unique index
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='funnel_stages', db_index=False)
+    status = models.CharField(max_length=30)
+    entered = models.PositiveIntegerField(default=0)
+    current = models.IntegerField(default=0)
+    exited = models.PositiveIntegerField(default=0)
+    # Time spent in the stage by the applications that left it
+    total_seconds = models.FloatField(default=0)
+    duration_histogram = ArrayField(models.BigIntegerField(), size=HISTOGRAM_BUCKETS, default=list)
+    
+    class Meta:
+        db_table = 'job_funnel_stages'
+        unique_together = ('job', 'status')
+    
+    def __str__(self):
+        return f"{self.job_id} {self.status}: {self.current} of {self.entered}"
+
+
+class JobEvent(models.Model):
+    """Raw job activity, folded into JobDailyStat by the compact_job_stats
+    command (see jobs/job_stats.py)"""
+    VIEW = 'view'
+    APPLY = 'apply'
+    SAVE = 'save'
+    KIND_CHOICES = (
+        (VIEW, 'View'),
+        (APPLY, 'Application'),
+        (SAVE, 'Save'),
+    )
+    
+    # Compaction reads by id; the table only holds events since the last run
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+', db_index=False)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Buffered views arrive as one event per job and flush
+    count = models.PositiveIntegerField(default=1)
+    # HyperLogLog sketch of the distinct viewers behind a view event
+    viewers = models.BinaryField(null=True)
+    created = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'job_events'
+    
+    def __str__(self):
+        return f"{self.job_id} {self.kind} x{self.count}"
+
+
+class JobDailyStat(models.Model):
+    """Views, applications and saves of a job on one day"""
+    # Covered by the (job, day) unique index
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_stats', db_index=False)
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    applications = models.PositiveIntegerField(default=0)
+    saves = models.PositiveIntegerField(default=0)
+    # HyperLogLog sketch of the day's distinct viewers (see jobs/hyperloglog.py)
+    viewers = models.BinaryField(null=True)
+    
+    class Meta:
+        db_table = 'job_daily_stats'
+        unique_together = ('job', 'day')
+        indexes = [
+            # Retention pruning
+            models.Index(fields=['day'], name='job_daily_stats_day_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.job_id} on {self.day}"
+    
+    @property
+    def unique_viewers(self):
+        """Approximate number of distinct viewers that day"""
+        return HyperLogLog.from_bytes(self.viewers).count() if self.viewers else 0
+
@@ -0,0 +1,63 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from .search_cache import get_generation
+
+
+def has_pending_messages(request):
+    """Anonymous visitors can carry flash messages (e.g. after logout)"""
+    if CookieStorage.cookie_name in request.COOKIES:
+        return True
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return '_messages' in request.session
+    return False
+
+
+def _page_key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'anon_page:{get_generation()}:{digest}'
+
+
+def cache_anonymous_page(on_hit=None):
+    """Serve whole pages to logged-out visitors from the cache.
+
+    The key varies on path and query string and includes the listings
+    generation, so any Job/Company change invalidates every cached page.
+    Logged-in users, non-GET requests, visitors with pending messages and
+    responses that set cookies always bypass the cache. ``on_hit`` runs
+    for requests answered from the cache, e.g. to still count a view.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD') or request.user.is_authenticated
+                    or has_pending_messages(request)):
+                return view_func(request, *args, **kwargs)
+
+            key = _page_key(request)
+            cached = cache.get(key)
+            if cached is not None:
+                if on_hit is not None:
+                    on_hit(request, *args, **kwargs)
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(key, (response.content, response['Content-Type']),
+                          settings.ANONYMOUS_PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def fragment_cache_context():
+    """Context for {% cache %} job card fragments shared by all users"""
+    return {
+        'cache_generation': get_generation(),
+        'card_cache_timeout': settings.JOB_CARD_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,266 @@
+import base64
+import datetime
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+from django.http import QueryDict
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision, which DjangoJSONEncoder truncates"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def estimated_count(queryset):
+    """Row estimate for a queryset taken from the PostgreSQL planner.
+
+    Runs ``EXPLAIN`` instead of ``COUNT(*)``, so the cost does not grow
+    with the number of matching rows. Other backends count exactly.
+    """
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator; mimics the parts of Page the templates use"""
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous, query_params=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.query_params = query_params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @cached_property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], 'next')
+
+    @cached_property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], 'prev')
+
+    def _query_for(self, cursor):
+        params = self.query_params.copy() if self.query_params is not None else QueryDict(mutable=True)
+        params.pop('page', None)
+        params[self.paginator.cursor_param] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query_for(self.next_cursor) if self.next_cursor else ''
+
+    @property
+    def previous_query(self):
+        return self._query_for(self.previous_cursor) if self.previous_cursor else ''
+
+
+class KeysetPaginator:
+    """Seek pagination over an ordered queryset.
+
+    Pages are addressed by opaque cursors holding the sort-key values of
+    the first/last row shown, so each page is a bounded index range scan
+    (``WHERE (key, id) < (...) LIMIT n``) instead of ``OFFSET``. The
+    queryset's ordering is used as the key; the primary key is appended
+    as a tiebreaker when missing. Nullable model fields sort last.
+
+    ``count`` is exact by default. With ``estimate_count=True`` it reads
+    the planner estimate and only counts exactly when that estimate is
+    below ``exact_count_threshold``.
+    """
+    cursor_param = 'cursor'
+
+    def __init__(self, queryset, per_page, estimate_count=False, exact_count_threshold=1000):
+        self.per_page = per_page
+        self.estimate_count = estimate_count
+        self.exact_count_threshold = exact_count_threshold
+        self.model = queryset.model
+        self.keys = self._ordering_keys(queryset)
+        self.queryset = queryset.order_by(*self._order_by(reverse=False))
+
+    def _ordering_keys(self, queryset):
+        ordering = list(queryset.query.order_by or self.model._meta.ordering)
+        keys = []
+        for item in ordering:
+            if isinstance(item, OrderBy):
+                name, descending = item.expression.name, item.descending
+            elif isinstance(item, str):
+                name, descending = item.lstrip('-'), item.startswith('-')
+            else:
+                raise ValueError(f'Unsupported ordering for keyset pagination: {item!r}')
+            if name == 'pk':
+                name = self.model._meta.pk.name
+            keys.append((name, descending))
+        pk_name = self.model._meta.pk.name
+        if pk_name not in [name for name, _ in keys]:
+            keys.append((pk_name, keys[-1][1] if keys else False))
+        return keys
+
+    def _field(self, name):
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotation such as a search rank
+            return None
+
+    def _nullable(self, name):
+        field = self._field(name)
+        return field is not None and field.null
+
+    def _order_by(self, reverse):
+        ordering = []
+        for name, descending in self.keys:
+            if reverse:
+                descending = not descending
+            expression = F(name).desc() if descending else F(name).asc()
+            if self._nullable(name):
+                # Nulls always come last when paging forward
+                if reverse:
+                    expression.nulls_first = True
+                else:
+                    expression.nulls_last = True
+            ordering.append(expression)
+        return ordering
+
+    def _seek_filter(self, values, reverse):
+        """Rows strictly after (or before, when reverse) the given key values"""
+        conditions = []
+        equal = Q()
+        for (name, descending), value in zip(self.keys, values):
+            if reverse:
+                descending = not descending
+            lookup = 'lt' if descending else 'gt'
+            nullable = self._nullable(name)
+            if value is None:
+                # Paging forward nothing sorts after NULL; backwards every
+                # non-null row does.
+                if reverse:
+                    conditions.append(equal & Q(**{f'{name}__isnull': False}))
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            step = Q(**{f'{name}__{lookup}': value})
+            if nullable and not reverse:
+                step |= Q(**{f'{name}__isnull': True})
+            conditions.append(equal & step)
+            equal &= Q(**{name: value})
+        if not conditions:
+            return Q(pk__in=[])
+        condition = reduce(operator.or_, conditions)
+
+        # Redundant range bound on the leading key so the database can
+        # start the index scan at the cursor instead of filtering from the
+        # first row.
+        name, descending = self.keys[0]
+        if values[0] is not None and not self._nullable(name):
+            if reverse:
+                descending = not descending
+            condition &= Q(**{f'{name}__{"lte" if descending else "gte"}': values[0]})
+        return condition
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, name) for name, _ in self.keys]
+        payload = json.dumps({'d': direction, 'v': values}, cls=CursorEncoder,
+                             separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, raw_values = payload['d'], payload['v']
+            if direction not in ('next', 'prev') or len(raw_values) != len(self.keys):
+                raise ValueError
+            values = []
+            for (name, _), value in zip(self.keys, raw_values):
+                field = self._field(name)
+                values.append(field.to_python(value) if field is not None and value is not None else value)
+        except Exception as exc:
+            raise InvalidCursor(cursor) from exc
+        return direction, values
+
+    def get_page(self, cursor=None, query_params=None):
+        """Return the page after/before ``cursor``; bad cursors give the first page"""
+        direction, values = 'next', None
+        if cursor:
+            try:
+                direction, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                direction, values = 'next', None
+
+        reverse = direction == 'prev'
+        queryset = self.queryset
+        if reverse:
+            queryset = queryset.order_by(*self._order_by(reverse=True))
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, reverse))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        return KeysetPage(rows, self, has_next, has_previous, query_params)
+
+    @cached_property
+    def _count(self):
+        """(count, is_estimate)"""
+        if self.estimate_count:
+            estimate = estimated_count(self.queryset)
+            if estimate >= self.exact_count_threshold:
+                return estimate, True
+        return self.queryset.count(), False
+
+    @property
+    def count(self):
+        return self._count[0]
+
+    @property
+    def count_is_estimate(self):
+        return self._count[1]
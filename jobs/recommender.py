@@ -0,0 +1,250 @@
+"""
+"People who applied to this job also applied to" recommendations.
+
+Applications and saved jobs are weighted and staged in a temporary table
+in the database, so the interaction matrix is never held in memory.
+Item-to-item co-occurrence (X.T @ X) is computed one block of job
+columns at a time: the interactions of the users who touched a block
+are streamed in chunks of whole users and each chunk's product with the
+block is summed. ``memory_mb`` caps the whole run: per-job arrays, one
+chunk of interactions, one block of co-occurrence, one batch of output
+rows and an allowance for the driver and allocator. Only the top-K
+neighbours of each job are kept, in the SimilarJob table.
+"""
+
+import time
+from array import array
+from collections import namedtuple
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection, transaction
+from scipy import sparse
+from companies.models import Job
+from .models import Application, SavedJob, SimilarJob
+from .search_cache import bump_generation
+
+# Interaction weights: applying says more than bookmarking
+APPLIED_WEIGHT = 1.0
+SAVED_WEIGHT = 0.5
+# Changes with every rebuild; part of the job_detail validators
+VERSION_KEY = 'similar_jobs:version'
+# Temporary table of weighted interactions, dropped when the rebuild commits
+INTERACTIONS_TABLE = 'similar_job_interactions'
+# Rows fetched per round trip from server-side cursors
+FETCH_SIZE = 10000
+# Peak bytes, measured with tracemalloc and rounded up, per job held for
+# the whole run (id, norm, bound, listed flag), per streamed interaction
+# while its chunk is turned into a matrix and multiplied, per bounded
+# co-occurrence non-zero of a block (including the sum made when a chunk
+# is added) and per SimilarJob row waiting in a batch
+BYTES_PER_JOB = 48
+BYTES_PER_INTERACTION = 96
+BYTES_PER_NONZERO = 24
+BYTES_PER_OUTPUT_ROW = 1024
+# What the per-item costs leave out: fetched rows, driver buffers, code
+# first run by the rebuild and memory the allocator keeps after frees
+# (max RSS growth of a 64 MB rebuild above its planned data, rounded up)
+RESERVED_MB = 48
+
+# Big-endian (job id, weight) pairs as packed by int8send || float4send
+PACKED_INTERACTION = np.dtype([('job_id', '>i8'), ('weight', '>f4')])
+
+JobColumns = namedtuple('JobColumns', ['ids', 'norms', 'bounds', 'listed'])
+
+
+def _stream(sql, params=()):
+    """Lists of rows from a server-side cursor, FETCH_SIZE at a time"""
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                return
+            yield rows
+
+
+def stage_interactions():
+    """Fill INTERACTIONS_TABLE; call inside the rebuild's transaction.
+
+    A user who both applied and saved counts once, with the larger
+    weight. Each user's weights are scaled by 1 / log(2 + interactions)
+    so that users who apply everywhere say less about any pair of jobs.
+    """
+    with connection.cursor() as cursor:
+        # Left over by an earlier rebuild inside the same outer transaction
+        cursor.execute(f'DROP TABLE IF EXISTS pg_temp.{INTERACTIONS_TABLE}')
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {INTERACTIONS_TABLE} ON COMMIT DROP AS '
+            f'SELECT user_id, job_id, count(*) OVER (PARTITION BY user_id) AS activity, '
+            f'(weight / ln(2 + count(*) OVER (PARTITION BY user_id)))::real AS weight '
+            f'FROM (SELECT user_id, job_id, max(weight) AS weight FROM ('
+            f'SELECT applicant_id AS user_id, job_id, %s::real AS weight FROM {Application._meta.db_table} '
+            f'UNION ALL SELECT user_id, job_id, %s::real FROM {SavedJob._meta.db_table}'
+            f') AS interactions GROUP BY user_id, job_id) AS pairs',
+            [APPLIED_WEIGHT, SAVED_WEIGHT],
+        )
+        cursor.execute(f'CREATE INDEX ON {INTERACTIONS_TABLE} (job_id)')
+        cursor.execute(f'CREATE INDEX ON {INTERACTIONS_TABLE} (user_id)')
+        cursor.execute(f'ANALYZE {INTERACTIONS_TABLE}')
+
+
+def job_columns():
+    """JobColumns of every job with interactions, ordered by id.
+
+    ``norms`` are the columns' L2 norms. ``bounds`` cap the non-zeros of
+    each job's co-occurrence column: the summed activity of its users, at
+    most one per job. ``listed`` marks the jobs that can be recommended.
+    """
+    ids, norms, bounds, listed = array('q'), array('f'), array('q'), array('b')
+    for rows in _stream(
+        f'SELECT interaction.job_id, sqrt(sum(interaction.weight * interaction.weight)), '
+        f'sum(interaction.activity), job.is_listed '
+        f'FROM {INTERACTIONS_TABLE} AS interaction JOIN {Job._meta.db_table} AS job '
+        f'ON job.id = interaction.job_id '
+        f'GROUP BY interaction.job_id, job.is_listed ORDER BY interaction.job_id'
+    ):
+        for job_id, norm, bound, is_listed in rows:
+            ids.append(job_id)
+            norms.append(norm)
+            bounds.append(int(bound))
+            listed.append(is_listed)
+    ids = np.frombuffer(ids, dtype=np.int64)
+    return JobColumns(
+        ids,
+        np.frombuffer(norms, dtype=np.float32),
+        np.minimum(np.frombuffer(bounds, dtype=np.int64), len(ids)),
+        np.frombuffer(listed, dtype=np.bool_),
+    )
+
+
+def memory_plan(jobs, memory_mb, batch_size):
+    """(interactions per chunk, co-occurrence non-zeros per block) for a
+    rebuild of ``jobs`` columns within ``memory_mb``"""
+    reserved = RESERVED_MB * 1024 * 1024 + batch_size * BYTES_PER_OUTPUT_ROW
+    budget = memory_mb * 1024 * 1024 - reserved - jobs * BYTES_PER_JOB
+    chunk_rows, block_nonzeros = budget // 2 // BYTES_PER_INTERACTION, budget // 2 // BYTES_PER_NONZERO
+    # A single user's interactions and a single job's column have to fit
+    if min(chunk_rows, block_nonzeros) < max(jobs, 1):
+        needed = reserved + jobs * (BYTES_PER_JOB + 2 * max(BYTES_PER_INTERACTION, BYTES_PER_NONZERO))
+        raise ValueError(f'{memory_mb} MB is too little for {jobs} jobs; '
+                         f'at least {-(-needed // (1024 * 1024))} MB is needed')
+    return chunk_rows, block_nonzeros
+
+
+def column_blocks(bounds, budget_nonzeros):
+    """Split job columns into consecutive blocks whose co-occurrence
+    bounds fit the budget; a block has at least one column"""
+    start, total = 0, 0
+    for column, bound in enumerate(bounds):
+        if total and total + bound > budget_nonzeros:
+            yield start, column
+            start, total = column, 0
+        total += bound
+    if start < len(bounds):
+        yield start, len(bounds)
+
+
+def _chunk(job_ids, counts, packed):
+    records = np.frombuffer(b''.join(packed), dtype=PACKED_INTERACTION)
+    rows = np.repeat(np.arange(len(counts)), counts)
+    return rows, np.searchsorted(job_ids, records['job_id']), records['weight'].astype(np.float32)
+
+
+def user_chunks(job_ids, start, stop, chunk_rows):
+    """(user rows, job columns, weights) of the users who interacted with
+    columns start..stop-1, in chunks of whole users of about
+    ``chunk_rows`` interactions; user rows are numbered per chunk"""
+    counts, packed = [], []
+    pending = 0
+    # One row per user, its (job id, weight) pairs packed into a bytea
+    for fetched in _stream(
+        f'SELECT count(*), string_agg(int8send(job_id) || float4send(weight), %s::bytea) '
+        f'FROM {INTERACTIONS_TABLE} WHERE user_id IN ('
+        f'SELECT user_id FROM {INTERACTIONS_TABLE} WHERE job_id BETWEEN %s AND %s) '
+        f'GROUP BY user_id',
+        [b'', int(job_ids[start]), int(job_ids[stop - 1])],
+    ):
+        for count, interactions in fetched:
+            counts.append(count)
+            packed.append(interactions)
+            pending += count
+            if pending >= chunk_rows:
+                yield _chunk(job_ids, counts, packed)
+                counts, packed = [], []
+                pending = 0
+    if counts:
+        yield _chunk(job_ids, counts, packed)
+
+
+def similar_jobs(columns, k=10, chunk_rows=1000000, block_nonzeros=1000000):
+    """Yield (job id, [(similar job id, score)]) with cosine-normalized
+    co-occurrence scores, best first, for the staged interactions"""
+    job_ids, norms = columns.ids, columns.norms.copy()
+    norms[norms == 0] = 1
+
+    for start, stop in column_blocks(columns.bounds, block_nonzeros):
+        block = None
+        for rows, cols, weights in user_chunks(job_ids, start, stop, chunk_rows):
+            matrix = sparse.csr_matrix((weights, (rows, cols)), shape=(rows.max() + 1, len(job_ids)))
+            product = matrix.T @ matrix[:, start:stop]
+            del matrix
+            block = product if block is None else block + product
+        if block is None:
+            continue
+        block = block.tocsc()
+        for offset in range(stop - start):
+            column = start + offset
+            lo, hi = block.indptr[offset], block.indptr[offset + 1]
+            neighbours, scores = block.indices[lo:hi], block.data[lo:hi]
+            keep = (neighbours != column) & columns.listed[neighbours]
+            neighbours, scores = neighbours[keep], scores[keep] / (norms[column] * norms[neighbours[keep]])
+            if not len(neighbours):
+                continue
+            count = min(k, len(neighbours))
+            best = np.argpartition(-scores, count - 1)[:count]
+            best = best[np.argsort(-scores[best])]
+            yield int(job_ids[column]), [
+                (int(job_ids[neighbours[i]]), float(scores[i])) for i in best
+            ]
+
+
+def rebuild_similar_jobs(k=10, memory_mb=256, batch_size=5000):
+    """Recompute the SimilarJob table within ``memory_mb``; returns
+    (jobs, rows) written. ValueError if the budget is too small."""
+    written_jobs = written_rows = 0
+    batch = []
+    # Readers keep seeing the previous table until the new one is committed
+    with transaction.atomic():
+        stage_interactions()
+        columns = job_columns()
+        chunk_rows, block_nonzeros = memory_plan(len(columns.ids), memory_mb, batch_size)
+        SimilarJob.objects.all().delete()
+        for job_id, neighbours in similar_jobs(columns, k, chunk_rows, block_nonzeros):
+            batch.extend(
+                SimilarJob(job_id=job_id, similar_job_id=similar_id, rank=rank, score=score)
+                for rank, (similar_id, score) in enumerate(neighbours, 1)
+            )
+            written_jobs += 1
+            if len(batch) >= batch_size:
+                SimilarJob.objects.bulk_create(batch)
+                written_rows += len(batch)
+                batch = []
+        SimilarJob.objects.bulk_create(batch)
+        written_rows += len(batch)
+    # Cached and conditionally served job pages embed the old neighbours
+    cache.set(VERSION_KEY, time.time(), None)
+    bump_generation()
+    return written_jobs, written_rows
+
+
+def similar_jobs_version():
+    return cache.get(VERSION_KEY)
+
+
+def get_similar_jobs(job, limit=5):
+    """Precomputed neighbours of a job that are still listed, in one query"""
+    rows = SimilarJob.objects.filter(
+        job_id=job.pk, similar_job__is_listed=True,
+    ).select_related('similar_job__company').order_by('rank')[:limit]
+    return [row.similar_job for row in rows]
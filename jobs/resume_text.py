@@ -0,0 +1,176 @@
+"""
+Resume text extraction for applicant search.
+
+ResumeText rows in ``pending`` state form a database-backed queue. A run
+claims a batch with ``SELECT ... FOR UPDATE SKIP LOCKED`` (so several
+runs can share the backlog), extracts the text in a pool of worker
+processes and stores it together with its tsvector. Each file is only
+ever extracted once; interrupted runs leave rows in ``processing``,
+which are requeued after ``stale_after``. A file that takes longer than
+``task_timeout`` counts as a failed attempt and its worker is replaced;
+after MAX_ATTEMPTS failures, timeouts or dead runs the file is marked
+``failed`` for good, so one bad PDF cannot stall or loop the queue.
+"""
+
+import logging
+import multiprocessing
+from datetime import timedelta
+from multiprocessing import TimeoutError
+
+from django.contrib.postgres.search import SearchVector
+from django.db import connections, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from pypdf import PdfReader
+from companies.models import SEARCH_CONFIG
+from .models import Application, ResumeText
+from .storage import content_storage
+
+logger = logging.getLogger(__name__)
+
+# Enough for any resume; keeps the tsvector well under PostgreSQL's 1MB limit
+MAX_TEXT_CHARS = 100000
+MAX_ATTEMPTS = 3
+
+
+def extract_text(path):
+    """Plain text of a PDF file. Runs in the worker processes."""
+    reader = PdfReader(path)
+    parts, size = [], 0
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        parts.append(text)
+        size += len(text)
+        if size >= MAX_TEXT_CHARS:
+            break
+    # NUL bytes are not allowed in PostgreSQL text columns
+    return '\n'.join(parts)[:MAX_TEXT_CHARS].replace('\x00', '')
+
+
+def _extract(task):
+    pk, path = task
+    try:
+        return pk, extract_text(path), ''
+    except Exception as exc:
+        return pk, None, f'{type(exc).__name__}: {exc}'
+
+
+def enqueue_existing(batch_size=1000):
+    """Queue every application resume that has no ResumeText row yet"""
+    names = Application.objects.exclude(resume='').exclude(
+        Exists(ResumeText.objects.filter(name=OuterRef('resume')))
+    ).values_list('resume', flat=True).distinct().order_by()
+
+    queued, batch = 0, []
+    for name in names.iterator(chunk_size=batch_size):
+        batch.append(name)
+        if len(batch) >= batch_size:
+            queued += len(ResumeText.enqueue(batch))
+            batch = []
+    if batch:
+        queued += len(ResumeText.enqueue(batch))
+    return queued
+
+
+def requeue_stale(stale_after):
+    """Return rows claimed by runs that died to the queue, or give up on
+    them once they have used all their attempts; returns rows requeued"""
+    stale = ResumeText.objects.filter(status='processing', claimed_at__lt=timezone.now() - stale_after)
+    stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status='failed', error=f'Gave up after {MAX_ATTEMPTS} interrupted attempts',
+    )
+    return stale.filter(attempts__lt=MAX_ATTEMPTS).update(status='pending')
+
+
+def claim(batch_size):
+    """Lock and mark up to ``batch_size`` pending rows; returns (pk, name)"""
+    with transaction.atomic():
+        rows = list(
+            ResumeText.objects.filter(status='pending').order_by('id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', 'name')[:batch_size]
+        )
+        ResumeText.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+            status='processing', claimed_at=timezone.now(), attempts=F('attempts') + 1,
+        )
+    return rows
+
+
+def store_results(results):
+    """Save extracted text and build the tsvectors in one UPDATE"""
+    results = list(results)
+    done = [
+        ResumeText(pk=pk, text=text, status='done', error='', extracted_at=timezone.now())
+        for pk, text, error in results if text is not None
+    ]
+    failed = {pk: error for pk, text, error in results if text is None}
+
+    with transaction.atomic():
+        ResumeText.objects.bulk_update(done, ['text', 'status', 'error', 'extracted_at'])
+        ResumeText.objects.filter(pk__in=[row.pk for row in done]).update(
+            search_vector=SearchVector('text', config=SEARCH_CONFIG)
+        )
+        for row in ResumeText.objects.filter(pk__in=list(failed)).only('attempts'):
+            row.status = 'failed' if row.attempts >= MAX_ATTEMPTS else 'pending'
+            row.error = failed[row.pk]
+            row.save(update_fields=['status', 'error'])
+    return len(done), len(failed)
+
+
+def _new_pool(workers):
+    # Children never touch the database; don't let them inherit connections
+    connections.close_all()
+    return multiprocessing.Pool(workers, maxtasksperchild=200)
+
+
+def run_batch(pool, tasks, task_timeout):
+    """Extract ``tasks`` in the pool; returns ``(results, timed_out)``.
+
+    A task not finished ``task_timeout`` seconds after the previous result
+    came in (hung or crashed child) is reported as an error.
+    """
+    pending = [(pk, pool.apply_async(_extract, ((pk, path),))) for pk, path in tasks]
+    results, timed_out = [], False
+    for pk, result in pending:
+        try:
+            results.append(result.get(timeout=task_timeout))
+        except TimeoutError:
+            timed_out = True
+            results.append((pk, None, f'Timed out after {task_timeout}s'))
+    return results, timed_out
+
+
+def process_queue(workers=None, batch_size=100, limit=None,
+                  stale_after=timedelta(minutes=30), task_timeout=60, progress=None):
+    """Drain the queue with a pool of worker processes.
+
+    Returns ``(extracted, failed)``. ``progress`` is called with the running
+    totals after every batch.
+    """
+    requeue_stale(stale_after)
+    extracted = failed = 0
+
+    pool = _new_pool(workers)
+    try:
+        while limit is None or extracted + failed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - extracted - failed)
+            rows = claim(size)
+            if not rows:
+                break
+            tasks = [(pk, content_storage.path(name)) for pk, name in rows]
+            results, timed_out = run_batch(pool, tasks, task_timeout)
+            ok, errors = store_results(results)
+            extracted += ok
+            failed += errors
+            if errors:
+                logger.warning('%d resume(s) could not be extracted', errors)
+            if timed_out:
+                # Hung children would hold their worker slot forever
+                pool.terminate()
+                pool = _new_pool(workers)
+            if progress is not None:
+                progress(extracted, failed)
+    finally:
+        pool.terminate()
+        pool.join()
+    return extracted, failed
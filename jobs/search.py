@@ -0,0 +1,111 @@
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import Exists, F, FloatField, OuterRef, Q
+from django.db.models.functions import Cast, Greatest
+from companies.models import SEARCH_CONFIG, Job
+from .models import ResumeText
+
+
+def uses_postgres():
+    """True when the default database supports the PostgreSQL search paths"""
+    return connection.vendor == 'postgresql'
+
+
+def keyword_search(jobs, keyword):
+    """Filter jobs by keyword.
+
+    On PostgreSQL this matches against the stored, GIN-indexed
+    ``Job.search_vector`` and annotates relevance as ``rank``. Other
+    backends fall back to case-insensitive substring matching.
+    """
+    if not uses_postgres():
+        return jobs.filter(
+            Q(title__icontains=keyword) |
+            Q(description__icontains=keyword) |
+            Q(category__icontains=keyword)
+        )
+
+    query = SearchQuery(keyword, search_type='websearch', config=SEARCH_CONFIG)
+    return jobs.filter(search_vector=query).annotate(
+        # Cast to double so the value survives a round trip through a
+        # pagination cursor unchanged
+        rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+    )
+
+
+def location_search(jobs, location):
+    """Filter jobs by city/location, tolerating typos on PostgreSQL.
+
+    Both columns carry ``gin_trgm_ops`` indexes, so the word-similarity
+    (``%>``) conditions are index-backed. Word similarity compares the
+    input with the best-matching part of each column, so partial entries
+    such as "Manch" still match. Matches are annotated with
+    ``location_similarity`` for ranking.
+    """
+    if not uses_postgres():
+        return jobs.filter(Q(city__icontains=location) | Q(location__icontains=location))
+
+    return jobs.filter(
+        Q(city__trigram_word_similar=location) |
+        Q(location__trigram_word_similar=location)
+    ).annotate(
+        location_similarity=Cast(Greatest(
+            TrigramWordSimilarity(location, 'city'),
+            TrigramWordSimilarity(location, 'location'),
+        ), FloatField())
+    )
+
+
+def order_by_relevance(jobs):
+    """Order by whichever relevance annotations the searches above added,
+    falling back to the default listing sort"""
+    ordering = [
+        f'-{name}' for name in ('rank', 'location_similarity')
+        if name in jobs.query.annotations
+    ]
+    return jobs.order_by(*ordering, *Job.SORT_ORDERING[Job.DEFAULT_SORT])
+
+
+def company_search(companies, search):
+    """Fuzzy company_name/email search for the admin panel"""
+    if not uses_postgres():
+        return companies.filter(
+            Q(company_name__icontains=search) |
+            Q(email__icontains=search)
+        )
+
+    return companies.filter(
+        Q(company_name__trigram_word_similar=search) |
+        Q(email__trigram_word_similar=search)
+    ).annotate(
+        similarity=Greatest(
+            TrigramWordSimilarity(search, 'company_name'),
+            TrigramWordSimilarity(search, 'email'),
+        )
+    ).order_by('-similarity', '-submitted_date')
+
+
+def application_search(applications, keyword):
+    """Filter applications by keyword in the cover letter or resume text.
+
+    On PostgreSQL the cover letter is matched through the
+    ``applications_cover_letter_fts`` expression index and the resume
+    through ``ResumeText.search_vector``. Resumes whose text has not been
+    extracted yet only match on their cover letter.
+    """
+    if not uses_postgres():
+        resume_match = Exists(ResumeText.objects.filter(
+            name=OuterRef('resume'), text__icontains=keyword,
+        ))
+        return applications.filter(Q(cover_letter__icontains=keyword) | Q(resume_match))
+
+    # Django 4.2.0 compiles SearchVector(config=...) client-side and crashes
+    # when no connection has been opened yet
+    connection.ensure_connection()
+    query = SearchQuery(keyword, search_type='websearch', config=SEARCH_CONFIG)
+    resume_match = Exists(ResumeText.objects.filter(name=OuterRef('resume'), search_vector=query))
+    return applications.annotate(
+        cover_letter_vector=SearchVector('cover_letter', config=SEARCH_CONFIG),
+    ).filter(Q(cover_letter_vector=query) | Q(resume_match))
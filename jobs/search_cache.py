@@ -0,0 +1,162 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from .pagination import KeysetPage, KeysetPaginator, InvalidCursor, estimated_count
+
+GENERATION_KEY = 'job_search:generation'
+HITS_KEY = 'job_search:hits'
+MISSES_KEY = 'job_search:misses'
+
+
+def get_generation():
+    """Current listings generation; part of every search/facet cache key"""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = int(time.time() * 1000)
+        cache.add(GENERATION_KEY, generation, None)
+        generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def bump_generation():
+    """Invalidate every cached search result and facet count at once"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key evicted: restart from the clock so old keys are never reused
+        cache.set(GENERATION_KEY, int(time.time() * 1000), None)
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def search_cache_stats():
+    """Hit/miss counters for the search result cache"""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_search_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+# Matched case-insensitively, so their case and spacing don't change results
+FREE_TEXT_FILTERS = ('keyword', 'location')
+
+
+def normalize_filters(**filters):
+    """Canonical form of search filters, used for cache keys. Only the
+    free-text filters are case-folded; exact-match ones (category, city,
+    ...) keep their case and are just stripped."""
+    return {
+        name: ' '.join(str(value).lower().split()) if name in FREE_TEXT_FILTERS else str(value).strip()
+        for name, value in sorted(filters.items())
+        if value
+    }
+
+
+def cache_key(prefix, **filters):
+    """Generation-scoped cache key for a normalized filter set"""
+    digest = hashlib.md5(
+        json.dumps(normalize_filters(**filters), sort_keys=True).encode()
+    ).hexdigest()
+    return f'{prefix}:{get_generation()}:{digest}'
+
+
+class CachedSearchPaginator(KeysetPaginator):
+    """KeysetPaginator that serves pages from a cached list of matching ids.
+
+    The first ``JOB_SEARCH_CACHE_MAX_IDS`` ids of a search and its total
+    are cached under the normalized filters and the listings generation.
+    A page is then a slice of that list hydrated with one ``pk IN (...)``
+    query. Cursors past the cached range fall back to the keyset seek.
+    """
+
+    def __init__(self, queryset, per_page, filters, **kwargs):
+        super().__init__(queryset, per_page, **kwargs)
+        self.key = cache_key('job_search', **filters)
+
+    @cached_property
+    def entry(self):
+        entry = cache.get(self.key)
+        if entry is not None:
+            _incr(HITS_KEY)
+            return entry
+
+        _incr(MISSES_KEY)
+        limit = settings.JOB_SEARCH_CACHE_MAX_IDS
+        ids = list(self.queryset.values_list('pk', flat=True)[:limit + 1])
+        truncated = len(ids) > limit
+        ids = ids[:limit]
+        if truncated:
+            count = max(estimated_count(self.queryset), limit + 1)
+            count_is_estimate = True
+        else:
+            count, count_is_estimate = len(ids), False
+        entry = {
+            'ids': ids,
+            'truncated': truncated,
+            'count': count,
+            'count_is_estimate': count_is_estimate,
+        }
+        cache.set(self.key, entry, settings.JOB_SEARCH_CACHE_TIMEOUT)
+        return entry
+
+    def _slice(self, cursor):
+        """(start, stop) into the cached ids for a cursor, or None to seek"""
+        ids = self.entry['ids']
+        if not cursor:
+            return 0, self.per_page
+        try:
+            direction, values = self.decode_cursor(cursor)
+        except InvalidCursor:
+            return 0, self.per_page
+        pk_position = [name for name, _ in self.keys].index(self.model._meta.pk.name)
+        try:
+            index = ids.index(values[pk_position])
+        except ValueError:
+            return None
+        if direction == 'prev':
+            return max(index - self.per_page, 0), index
+        if index + 1 >= len(ids) and self.entry['truncated']:
+            return None
+        return index + 1, index + 1 + self.per_page
+
+    def page_ids(self, cursor=None):
+        """Ids of the page get_page() serves from the cache for ``cursor``,
+        or None when it has to seek past the cached ids"""
+        bounds = self._slice(cursor)
+        if bounds is None:
+            return None
+        start, stop = bounds
+        return self.entry['ids'][start:stop]
+
+    def get_page(self, cursor=None, query_params=None):
+        bounds = self._slice(cursor)
+        if bounds is None:
+            return super().get_page(cursor, query_params)
+
+        start, stop = bounds
+        ids = self.entry['ids']
+        rows = list(self.queryset.filter(pk__in=ids[start:stop]))
+        has_next = stop < len(ids) or self.entry['truncated']
+        return KeysetPage(rows, self, has_next, start > 0, query_params)
+
+    @cached_property
+    def _count(self):
+        return self.entry['count'], self.entry['count_is_estimate']
@@ -0,0 +1,151 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from companies.models import Company, CompanyStats, Job
+from .funnel import record_transitions
+from .job_stats import record_event
+from .matching import update_job_vector, update_seeker_vector
+from .models import (
+    Application, JobEvent, JobFunnelStage, JobSeeker, MatchVector, ResumeText, SavedJob, StoredBlob,
+)
+from .search_cache import bump_generation
+from .user_jobs import invalidate_user_job_ids
+
+
+@receiver([post_save, post_delete], sender=Job)
+@receiver([post_save, post_delete], sender=Company)
+def invalidate_search_cache(sender, **kwargs):
+    """Any job or company change invalidates cached searches and facets"""
+    bump_generation()
+
+
+# Deleted after commit: before it, a concurrent request could re-cache the
+# rows it still sees for the whole cache timeout
+@receiver([post_save, post_delete], sender=Application)
+def invalidate_applied_jobs(sender, instance, **kwargs):
+    user_id = instance.applicant_id
+    transaction.on_commit(lambda: invalidate_user_job_ids(user_id))
+
+
+@receiver([post_save, post_delete], sender=SavedJob)
+def invalidate_saved_jobs(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user_job_ids(user_id))
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_save, sender=SavedJob)
+def record_job_activity(sender, instance, created, raw=False, **kwargs):
+    """Raw events for the daily rollups (compact_job_stats)"""
+    if created and not raw:
+        record_event(JobEvent.APPLY if sender is Application else JobEvent.SAVE, instance.job_id)
+
+
+@receiver(pre_save, sender=JobSeeker)
+@receiver(pre_save, sender=Application)
+def remember_stored_state(sender, instance, **kwargs):
+    """Note the resume (and application status) stored before this save so
+    post_save can diff them"""
+    fields = ['resume', 'status', 'status_date'] if sender is Application else ['resume']
+    stored = {}
+    if not instance._state.adding:
+        stored = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+    instance._stored_resume = stored.get('resume') or ''
+    if sender is Application:
+        instance._stored_status = (stored.get('status', ''), stored.get('status_date'))
+        if instance.status != instance._stored_status[0]:
+            instance.status_date = timezone.now()
+
+
+@receiver(post_save, sender=JobSeeker)
+@receiver(post_save, sender=Application)
+def count_resume_references(sender, instance, **kwargs):
+    old, new = getattr(instance, '_stored_resume', ''), instance.resume.name or ''
+    if old != new:
+        StoredBlob.acquire(new)
+        StoredBlob.release(old)
+        if sender is Application:
+            # Text is extracted in the background (extract_resume_text)
+            ResumeText.enqueue([new])
+    instance._stored_resume = new
+
+
+@receiver(post_delete, sender=JobSeeker)
+@receiver(post_delete, sender=Application)
+def release_resume(sender, instance, **kwargs):
+    StoredBlob.release(instance.resume.name or '')
+
+
+@receiver(post_save, sender=Application)
+def record_status_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Log the change in the application's event history and job funnel"""
+    from_status, from_date = getattr(instance, '_stored_status', ('', None))
+    if raw or instance.status == from_status:
+        return
+    if update_fields is not None and 'status_date' not in update_fields:
+        sender.objects.filter(pk=instance.pk).update(status_date=instance.status_date)
+    record_transitions(
+        [(instance.pk, instance.job_id, from_status, from_date, instance.status)],
+        instance.status_date,
+    )
+    instance._stored_status = (instance.status, instance.status_date)
+
+
+@receiver(post_delete, sender=Application)
+def leave_funnel(sender, instance, **kwargs):
+    # Plain UPDATEs: when the whole job or company is being deleted its
+    # stages and stats may be gone already
+    JobFunnelStage.objects.filter(job_id=instance.job_id, status=instance.status).update(
+        current=F('current') - 1
+    )
+    CompanyStats.add_for_jobs(
+        {instance.job_id: {'total_applications': -1, f'applications_{instance.status}': -1}},
+        heal=False,
+    )
+
+
+@receiver(post_save, sender=Company)
+def create_company_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CompanyStats.objects.bulk_create([CompanyStats(company=instance)], ignore_conflicts=True)
+
+
+@receiver(post_save, sender=Job)
+def count_company_jobs(sender, instance, raw=False, **kwargs):
+    if not raw:
+        CompanyStats.refresh_jobs(instance.company_id)
+
+
+@receiver(post_delete, sender=Job)
+def uncount_company_job(sender, instance, **kwargs):
+    CompanyStats.refresh_jobs(instance.company_id, heal=False)
+    CompanyStats.add({instance.company_id: {'total_views': -instance.views_count}}, heal=False)
+
+
+# Fields that feed the matching vectors
+JOB_MATCH_FIELDS = {'title', 'category', 'requirements', 'description'}
+SEEKER_MATCH_FIELDS = {'skills', 'experience', 'education'}
+
+
+@receiver(post_save, sender=Job)
+def refresh_job_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or JOB_MATCH_FIELDS & set(update_fields):
+        update_job_vector(instance)
+
+
+@receiver(post_save, sender=JobSeeker)
+def refresh_seeker_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or SEEKER_MATCH_FIELDS & set(update_fields):
+        update_seeker_vector(instance)
+
+
+@receiver(post_delete, sender=Job)
+def delete_job_vector(sender, instance, **kwargs):
+    MatchVector.objects.filter(kind=MatchVector.JOB, object_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=JobSeeker)
+def delete_seeker_vector(sender, instance, **kwargs):
+    MatchVector.objects.filter(kind=MatchVector.SEEKER, object_id=instance.user_id).delete()
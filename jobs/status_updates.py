@@ -0,0 +1,81 @@
+"""
+Bulk application status changes.
+
+Companies move whole sets of applications (a selection, or everything
+matching the current filters) to a new status at once. On PostgreSQL the
+rows are changed by a single ``UPDATE ... RETURNING`` over the filtered
+queryset, which also reports which applicants to notify, and the
+notifications are written with one batched ``bulk_create``. The changes
+are logged to the status history and job funnels in the same transaction
+(see jobs/funnel.py). Applications already in the target status are left
+alone and not notified again.
+"""
+
+from django.db import connection, transaction
+from django.utils import timezone
+from companies.models import Job
+from notifications.models import Notification
+from .funnel import record_transitions
+from .models import Application
+
+NOTIFICATION_BATCH_SIZE = 1000
+
+
+def _update_returning(applications, status, now):
+    """Transitions of the rows changed by one UPDATE"""
+    sql, params = applications.order_by().values('pk').query.sql_with_params()
+    table = Application._meta.db_table
+    with connection.cursor() as cursor:
+        # The FROM subquery locks the rows and reports their previous status
+        cursor.execute(
+            f'UPDATE {table} AS application '
+            f'SET status = %s, updated_date = %s, status_date = %s '
+            f'FROM (SELECT id, status, status_date FROM {table} '
+            f'WHERE id IN ({sql}) AND status <> %s FOR UPDATE) AS previous '
+            f'WHERE application.id = previous.id '
+            f'RETURNING application.id, application.job_id, previous.status, '
+            f'previous.status_date, application.applicant_id',
+            [status, now, now, *params, status],
+        )
+        return cursor.fetchall()
+
+
+def _update_listed(applications, status, now):
+    rows = list(applications.order_by().values_list('pk', 'job_id', 'status', 'status_date', 'applicant_id'))
+    Application.objects.filter(pk__in=[row[0] for row in rows]).update(
+        status=status, updated_date=now, status_date=now,
+    )
+    return rows
+
+
+def notifications_for(changed, status):
+    """Unsaved Notification rows telling applicants about their new status"""
+    label = dict(Application.STATUS_CHOICES)[status]
+    titles = dict(Job.objects.filter(pk__in={row[1] for row in changed}).values_list('id', 'title'))
+    return [
+        Notification(
+            user_id=applicant_id,
+            title='Application Status Updated',
+            message=f'Your application for "{titles[job_id]}" is now {label}.',
+            notification_type='application_status',
+        )
+        for _, job_id, _, _, applicant_id in changed
+    ]
+
+
+def bulk_set_status(applications, status):
+    """Move every application in the queryset to ``status`` and notify the
+    applicants; returns the number of applications changed"""
+    if status not in dict(Application.STATUS_CHOICES):
+        raise ValueError(f'Unknown application status: {status}')
+    applications = applications.exclude(status=status)
+    now = timezone.now()
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            changed = _update_returning(applications, status, now)
+        else:
+            changed = _update_listed(applications, status, now)
+        record_transitions([row[:4] + (status,) for row in changed], now)
+        Notification.objects.bulk_create(notifications_for(changed, status),
+                                         batch_size=NOTIFICATION_BATCH_SIZE)
+    return len(changed)
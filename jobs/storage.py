@@ -0,0 +1,136 @@
+"""
+Content-addressed storage for resumes and application attachments.
+
+Files are named by the SHA-256 of their content and sharded two levels
+deep (``blobs/ab/cd/abcd....pdf``), so identical uploads share one file.
+The hash is computed by the upload handlers below while the request body
+streams in; content from elsewhere is hashed on save. Which records use a
+blob is tracked by ``jobs.models.StoredBlob``; the file is removed when
+its last reference goes away.
+
+Writing a blob and deleting it both hold ``lock_blob`` until their
+transaction ends, so a file that already exists (and is therefore not
+rewritten) cannot be deleted before the new reference to it commits.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import connection
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs'
+
+
+def content_hash(content):
+    """SHA-256 of a file's content, reusing the hash computed on upload"""
+    digest = getattr(content, 'content_hash', None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def blob_name(digest, filename=''):
+    """Sharded storage name for a content hash, keeping the file extension"""
+    extension = os.path.splitext(filename)[1].lower()
+    return f'{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOB_PREFIX}/')
+
+
+def lock_blob(name):
+    """Serialize writers and deleters of one blob until the current
+    transaction ends; call inside ``transaction.atomic()``"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [name])
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that stores each distinct content exactly once.
+
+    ``upload_to`` of the fields using it is ignored: the name is derived
+    from the content alone, so the same PDF uploaded as a profile resume
+    and with several applications maps to a single file.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = blob_name(content_hash(content), name)
+        # Held until the caller's transaction records its reference
+        lock_blob(name)
+        if not self.exists(name):
+            self._write(name, content)
+        return name
+
+    def _write(self, name, content):
+        """Write via a temporary file and an atomic rename, so concurrent
+        uploads of the same content never see a partial blob"""
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    tmp.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+content_storage = ContentAddressedStorage()
+
+
+class HashingUploadMixin:
+    """Hash upload chunks as they stream through the handler"""
+
+    def new_file(self, *args, **kwargs):
+        # Before super(): MemoryFileUploadHandler raises StopFutureHandlers
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        remaining = super().receive_data_chunk(raw_data, start)
+        # None means this handler consumed the chunk
+        if remaining is None:
+            self.hasher.update(raw_data)
+        return remaining
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.content_hash = self.hasher.hexdigest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
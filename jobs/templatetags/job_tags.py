@@ -0,0 +1,15 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def applied_to(job, user_jobs):
+    """{% if job|applied_to:user_jobs %} - O(1) membership, no query"""
+    return getattr(job, 'pk', job) in user_jobs.applied
+
+
+@register.filter
+def saved_by(job, user_jobs):
+    """{% if job|saved_by:user_jobs %} - O(1) membership, no query"""
+    return getattr(job, 'pk', job) in user_jobs.saved
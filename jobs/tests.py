@@ -1 +1,287 @@
- 
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from accounts.models import User
+from companies.models import Company, CompanyStats, Job
+from .matching import JobIndex, job_terms
+from .models import Application, JobEvent, JobFunnelStage, ResumeText, SavedJob, SimilarJob, StoredBlob
+from .recommender import job_columns, rebuild_similar_jobs, similar_jobs, stage_interactions
+from .search_cache import cache_key
+from .storage import content_storage
+from .view_counter import ViewCountBuffer, apply_view_counts
+
+
+def make_job(name='acme'):
+    user = User.objects.create_user(username=name, password='x', user_type='company')
+    company = Company.objects.create(
+        user=user, company_name=name.title(), registration_number=name, email=f'{name}@example.com',
+        phone='1', address='1 Main St', city='Lahore', state='Punjab', description='-', status='approved',
+    )
+    return Job.objects.create(
+        company=company, title='Engineer', description='-', requirements='-', responsibilities='-',
+        location='Lahore', city='Lahore', job_type='full-time', category='IT', experience_required='1-3',
+    )
+
+
+def use_temporary_media(test):
+    """Point MEDIA_ROOT (and so content_storage) at a throwaway directory"""
+    media_root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+    settings_override = override_settings(MEDIA_ROOT=media_root)
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+
+
+class ViewCountBufferTests(TransactionTestCase):
+    """Buffers flush from their own threads, so they need committed rows"""
+
+    def setUp(self):
+        self.jobs = [make_job('acme'), make_job('globex')]
+
+    def test_full_buffer_does_not_write_in_request_thread(self):
+        buffer = ViewCountBuffer(flush_interval=3600, max_buffer=5)
+        try:
+            with self.assertNumQueries(0):
+                for _ in range(20):
+                    buffer.record(self.jobs[0].pk)
+            # The flusher thread was woken rather than waiting an hour
+            deadline = time.monotonic() + 5
+            while not Job.objects.get(pk=self.jobs[0].pk).views_count and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertGreaterEqual(Job.objects.get(pk=self.jobs[0].pk).views_count, 5)
+        finally:
+            buffer.stop()
+        self.jobs[0].refresh_from_db()
+        self.assertEqual(self.jobs[0].views_count, 20)
+
+    def test_concurrent_workers_lose_no_increments(self):
+        # One buffer per worker process, several request threads each
+        workers = [ViewCountBuffer(flush_interval=0.01, max_buffer=7) for _ in range(4)]
+        views_per_thread = 250
+
+        def browse(buffer, job):
+            for _ in range(views_per_thread):
+                buffer.record(job.pk)
+
+        threads = [
+            threading.Thread(target=browse, args=(buffer, job))
+            for buffer in workers for job in self.jobs for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for buffer in workers:
+            buffer.stop()
+
+        for job in self.jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.views_count, len(workers) * 3 * views_per_thread)
+        stats = CompanyStats.objects.get(pk=self.jobs[0].company_id)
+        self.assertEqual(stats.total_views, len(workers) * 3 * views_per_thread)
+
+
+class ApplicationSubmitTests(TransactionTestCase):
+    """Each thread submits over its own connection, like parallel requests"""
+
+    def setUp(self):
+        use_temporary_media(self)
+        self.job = make_job()
+        self.applicant = User.objects.create_user(username='seeker', password='x', user_type='jobseeker')
+
+    def test_parallel_submissions_create_one_application_and_blob(self):
+        attempts = 8
+        barrier = threading.Barrier(attempts)
+        results = []
+
+        def submit():
+            try:
+                application = Application(
+                    job=self.job, applicant=self.applicant, cover_letter='Hello',
+                    resume=SimpleUploadedFile('cv.pdf', b'%PDF-1.4 same resume'),
+                )
+                barrier.wait()
+                results.append(application.submit())
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(attempts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), [False] * (attempts - 1) + [True])
+        application = Application.objects.get(job=self.job, applicant=self.applicant)
+        blob = StoredBlob.objects.get()
+        self.assertEqual(blob.name, application.resume.name)
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(content_storage.exists(blob.name))
+        # The save receivers' bookkeeping ran once, for the winner
+        self.assertTrue(ResumeText.objects.filter(name=blob.name).exists())
+        self.assertEqual(application.events.get().to_status, 'submitted')
+        self.assertEqual(JobFunnelStage.objects.get(job=self.job, status='submitted').entered, 1)
+        self.assertEqual(JobEvent.objects.filter(job=self.job, kind=JobEvent.APPLY).count(), 1)
+        stats = CompanyStats.objects.get(pk=self.job.company_id)
+        self.assertEqual((stats.total_applications, stats.applications_submitted), (1, 1))
+
+
+class StoredBlobTests(TransactionTestCase):
+
+    def setUp(self):
+        use_temporary_media(self)
+
+    def test_unreferenced_delete_waits_for_uncommitted_reuse(self):
+        content = b'%PDF-1.4 shared resume'
+        # The last reference was released; its on_commit delete is about to run
+        with transaction.atomic():
+            name = content_storage.save('cv.pdf', ContentFile(content))
+        saved, deleted = threading.Event(), threading.Event()
+
+        def upload_again():
+            try:
+                with transaction.atomic():
+                    # The file exists, so save() skips the write and relies on it
+                    content_storage.save('cv.pdf', ContentFile(content))
+                    StoredBlob.acquire(name)
+                    saved.set()
+                    deleted.wait(timeout=0.3)
+            finally:
+                connection.close()
+
+        def delete_unreferenced():
+            saved.wait()
+            try:
+                StoredBlob.delete_if_unreferenced(name)
+            finally:
+                deleted.set()
+                connection.close()
+
+        threads = [threading.Thread(target=upload_again), threading.Thread(target=delete_unreferenced)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(content_storage.exists(name))
+        self.assertEqual(StoredBlob.objects.get(name=name).ref_count, 1)
+
+
+class ListingValidatorTests(TestCase):
+
+    def setUp(self):
+        self.jobs = [make_job('acme'), make_job('globex')]
+        self.url = reverse('job_list') + '?sort=most_viewed'
+
+    def test_revalidation_reads_only_the_cache(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_view_counts_reordering_the_page_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        # Flushed views leave updated_at and the generation alone
+        apply_view_counts({self.jobs[0].pk: 5})
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Until the cached result ids they were rendered from expire
+        cache.delete(cache_key('job_search', sort='most_viewed'))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class JobIndexTests(TestCase):
+
+    def setUp(self):
+        self.jobs = [make_job(name) for name in ('acme', 'globex', 'initech', 'umbrella')]
+        self.index = JobIndex()
+
+    def live_ids(self, snapshot):
+        return sorted(snapshot.ids[snapshot.live].tolist())
+
+    @mock.patch('jobs.matching.REBUILD_FRACTION', 1)
+    def test_saving_a_job_replaces_only_its_row(self):
+        first = self.index.snapshot()
+        job = self.jobs[0]
+        job.title = 'Python developer'
+        job.save()
+
+        second = self.index.snapshot()
+        # The base block and IDF are reused, the job's row is appended
+        self.assertIs(second.blocks[0], first.blocks[0])
+        self.assertIs(second.idf, first.idf)
+        self.assertEqual(self.live_ids(second), sorted(job.pk for job in self.jobs))
+        self.assertEqual(second.ids[-1], job.pk)
+        self.assertFalse(second.live[first.ids.tolist().index(job.pk)])
+        expected = second.vectorize([job_terms(job)])
+        self.assertEqual((second.blocks[-1][-1] != expected).nnz, 0)
+
+    @mock.patch('jobs.matching.REBUILD_FRACTION', 1)
+    def test_unlisted_jobs_leave_and_a_rebuild_compacts(self):
+        first = self.index.snapshot()
+        unlisted = self.jobs[1]
+        Job.objects.filter(pk=unlisted.pk).update(is_active=False)
+        Job.objects.filter(pk=unlisted.pk).refresh_listed()
+        second = self.index.snapshot()
+        self.assertNotIn(unlisted.pk, self.live_ids(second))
+        self.assertNotIn(unlisted.pk, self.index.rows)
+
+        with mock.patch('jobs.matching.REBUILD_FRACTION', 0):
+            job = self.jobs[2]
+            job.title = 'Data engineer'
+            job.save()
+            third = self.index.snapshot()
+        self.assertEqual(len(third.blocks), 1)
+        self.assertTrue(third.live.all())
+        self.assertIsNot(third.idf, first.idf)
+        self.assertEqual(third.ids.tolist(), sorted(job.pk for job in self.jobs if job != unlisted))
+
+
+class SimilarJobsTests(TestCase):
+
+    def setUp(self):
+        self.jobs = [make_job(name) for name in ('acme', 'globex', 'initech', 'umbrella')]
+        seekers = [
+            User.objects.create_user(username=f'seeker{i}', password='x', user_type='jobseeker')
+            for i in range(4)
+        ]
+        applied = {0: [0, 1], 1: [0, 1, 2], 2: [2, 3], 3: [1, 2, 3]}
+        Application.objects.bulk_create([
+            Application(job=self.jobs[job], applicant=seekers[seeker], resume='cv.pdf', cover_letter='-')
+            for seeker, jobs in applied.items() for job in jobs
+        ])
+        SavedJob.objects.create(user=seekers[0], job=self.jobs[3])
+
+    def neighbours(self, chunk_rows, block_nonzeros):
+        with transaction.atomic():
+            stage_interactions()
+            return dict(similar_jobs(job_columns(), 3, chunk_rows, block_nonzeros))
+
+    def test_blocks_and_chunks_do_not_change_neighbours(self):
+        whole = self.neighbours(10 ** 6, 10 ** 6)
+        self.assertEqual([job_id for job_id, _ in whole[self.jobs[0].pk]][0], self.jobs[1].pk)
+        # One job per block, one user per chunk, two users per fetch
+        with mock.patch('jobs.recommender.FETCH_SIZE', 2):
+            split = self.neighbours(1, 1)
+        self.assertEqual(split.keys(), whole.keys())
+        for job_id, neighbours in whole.items():
+            self.assertEqual([j for j, _ in split[job_id]], [j for j, _ in neighbours])
+            self.assertEqual([round(s, 5) for _, s in split[job_id]], [round(s, 5) for _, s in neighbours])
+
+    def test_too_small_a_budget_fails_before_touching_the_table(self):
+        rebuild_similar_jobs(k=3)
+        rows = SimilarJob.objects.count()
+        self.assertTrue(rows)
+        with self.assertRaises(ValueError):
+            rebuild_similar_jobs(k=3, memory_mb=1)
+        self.assertEqual(SimilarJob.objects.count(), rows)
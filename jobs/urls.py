@@ -8,5 +8,6 @@ urlpatterns = [
     path('jobs/<int:pk>/apply/', views.apply_job, name='apply_job'),
     path('my-applications/', views.my_applications, name='my_applications'),
     path('saved-jobs/', views.saved_jobs_view, name='saved_jobs'),
+    path('recommended-jobs/', views.recommended_jobs_view, name='recommended_jobs'),
     path('save-job/<int:pk>/', views.save_job, name='save_job'),
 ]
\ No newline at end of file
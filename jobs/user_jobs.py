@@ -0,0 +1,55 @@
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import CharField, Value
+from .models import Application, SavedJob
+
+# Ids of the jobs a user has applied to / saved
+UserJobIds = namedtuple('UserJobIds', ['applied', 'saved'])
+
+EMPTY = UserJobIds(frozenset(), frozenset())
+
+# Cached sets are dropped whenever the user applies or (un)saves; the
+# timeout is only a safety net.
+CACHE_TIMEOUT = 60 * 60
+
+
+def _cache_key(user_id):
+    return f'user_jobs:{user_id}'
+
+
+def load_user_job_ids(user_id):
+    """Applied and saved job ids for a user, in one query"""
+    applied = Application.objects.filter(applicant_id=user_id).values_list(
+        'job_id', Value('applied', output_field=CharField())
+    )
+    saved = SavedJob.objects.filter(user_id=user_id).values_list(
+        'job_id', Value('saved', output_field=CharField())
+    )
+    ids = {'applied': set(), 'saved': set()}
+    for job_id, kind in applied.union(saved, all=True):
+        ids[kind].add(job_id)
+    return UserJobIds(frozenset(ids['applied']), frozenset(ids['saved']))
+
+
+def get_user_job_ids(user):
+    """Cached UserJobIds for a user; empty for anonymous users"""
+    if not user.is_authenticated:
+        return EMPTY
+    key = _cache_key(user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        ids = load_user_job_ids(user.pk)
+        cache.set(key, ids, CACHE_TIMEOUT)
+    return ids
+
+
+def invalidate_user_job_ids(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def user_job_ids(request):
+    """Request-scoped UserJobIds: loaded at most once per request"""
+    if not hasattr(request, '_user_job_ids'):
+        request._user_job_ids = get_user_job_ids(request.user)
+    return request._user_job_ids
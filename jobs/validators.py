@@ -0,0 +1,91 @@
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+
+HEADER_SIZE = 1024
+TRAILER_SIZE = 1024
+SCAN_CHUNK_SIZE = 64 * 1024
+# Longest token the scan must recognise across a chunk boundary
+SCAN_OVERLAP = 64
+
+PDF_HEADER = re.compile(rb'%PDF-\d\.\d')
+PAGE = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+OBJECT_STREAM = re.compile(rb'/Type\s*/ObjStm(?![A-Za-z])')
+# Attached files, scripts and launch actions; none belong in a resume
+EMBEDDED_OBJECT = re.compile(rb'/(?:EmbeddedFile|JavaScript|Launch)(?![A-Za-z])')
+
+
+def _read_at(file, offset, size, whence=os.SEEK_SET):
+    file.seek(offset, whence)
+    return file.read(size)
+
+
+def scan_pdf(file, max_pages=None, max_embedded=None):
+    """Count pages and embedded objects, one chunk in memory at a time.
+
+    Stops reading as soon as a limit is exceeded. Pages stored inside
+    compressed object streams are not visible to the scan; ``pages`` is
+    None when the document uses them and no page was found.
+    """
+    pages = embedded = 0
+    compressed = False
+    tail = b''
+    file.seek(0)
+    for chunk in file.chunks(SCAN_CHUNK_SIZE):
+        window = tail + chunk
+        # Only count matches that end in the new chunk; the rest were
+        # counted with the previous window
+        boundary = len(tail)
+        pages += sum(1 for m in PAGE.finditer(window) if m.end() > boundary)
+        embedded += sum(1 for m in EMBEDDED_OBJECT.finditer(window) if m.end() > boundary)
+        compressed = compressed or OBJECT_STREAM.search(window) is not None
+        if (max_pages is not None and pages > max_pages) or \
+                (max_embedded is not None and embedded > max_embedded):
+            break
+        tail = window[-SCAN_OVERLAP:]
+    file.seek(0)
+    if not pages and compressed:
+        pages = None
+    return pages, embedded
+
+
+def validate_resume(file):
+    """Check that an uploaded resume is a real, reasonably sized PDF.
+
+    Only the header and trailer are read to recognise the format; the
+    page and embedded object limits are checked by a chunked scan, so
+    uploads spooled to disk are never loaded into memory whole. Files
+    already stored (unchanged form fields) are not re-validated.
+    """
+    if not isinstance(file, UploadedFile):
+        return
+
+    if file.size > settings.RESUME_MAX_SIZE:
+        raise ValidationError(
+            'Resume file size must not exceed %(size)dMB.',
+            params={'size': settings.RESUME_MAX_SIZE // (1024 * 1024)},
+        )
+
+    if not file.name.lower().endswith('.pdf'):
+        raise ValidationError('Only PDF files are allowed.')
+
+    header = _read_at(file, 0, HEADER_SIZE)
+    trailer = _read_at(file, -min(TRAILER_SIZE, file.size), TRAILER_SIZE, os.SEEK_END)
+    file.seek(0)
+    if not PDF_HEADER.search(header) or b'%%EOF' not in trailer or b'startxref' not in trailer:
+        raise ValidationError('The file is not a valid PDF document.')
+
+    max_pages = settings.RESUME_MAX_PAGES
+    max_embedded = settings.RESUME_MAX_EMBEDDED_OBJECTS
+    pages, embedded = scan_pdf(file, max_pages, max_embedded)
+    if pages == 0:
+        raise ValidationError('The PDF does not contain any pages.')
+    if pages is not None and pages > max_pages:
+        raise ValidationError(
+            'Resume must not be longer than %(max)d pages.', params={'max': max_pages}
+        )
+    if embedded > max_embedded:
+        raise ValidationError('Resume contains too many attachments, scripts or other embedded objects.')
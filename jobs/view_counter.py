@@ -0,0 +1,194 @@
+"""
+Write-behind buffer for Job.views_count.
+
+Job detail hits only bump an in-process counter. Pending increments are
+applied as one batched ``views_count = views_count + n`` UPDATE by a
+background thread every JOB_VIEW_FLUSH_INTERVAL seconds, or as soon as
+the buffer reaches JOB_VIEW_MAX_BUFFER, and at interpreter exit. Each worker process
+keeps its own buffer; because the UPDATE is relative, concurrent flushes
+from many workers never overwrite each other.
+
+Alongside the raw count, each job gets a HyperLogLog sketch of who viewed
+it (user id, or a hash of the session for anonymous visitors). Sketches
+travel with the flushed view events and are merged per job and day by
+the compact_job_stats command, so refreshes and repeat visits do not
+inflate the unique viewer numbers.
+"""
+
+import atexit
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from companies.models import CompanyStats, Job
+from .hyperloglog import HyperLogLog
+from .job_stats import record_events
+from .models import JobEvent
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCountBuffer:
+    """Thread-safe accumulator of per-job view increments"""
+
+    def __init__(self, flush_interval=None, max_buffer=None):
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._counts = Counter()
+        self._viewers = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    @property
+    def interval(self):
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return settings.JOB_VIEW_FLUSH_INTERVAL
+
+    @property
+    def limit(self):
+        if self.max_buffer is not None:
+            return self.max_buffer
+        return settings.JOB_VIEW_MAX_BUFFER
+
+    def record(self, job_id, count=1, viewer=None):
+        """Buffer ``count`` views of a job by ``viewer``; never touches the
+        database, a full buffer wakes the flusher thread"""
+        with self._lock:
+            self._counts[job_id] += count
+            self._pending += count
+            if viewer is not None:
+                if job_id not in self._viewers:
+                    self._viewers[job_id] = HyperLogLog()
+                self._viewers[job_id].add(viewer)
+            full = self._pending >= self.limit
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def _drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            viewers, self._viewers = self._viewers, {}
+            self._pending = 0
+        return counts, viewers
+
+    def _restore(self, counts, viewers):
+        with self._lock:
+            self._counts.update(counts)
+            self._pending += sum(counts.values())
+            for job_id, sketch in viewers.items():
+                if job_id in self._viewers:
+                    sketch.update(self._viewers[job_id])
+                self._viewers[job_id] = sketch
+
+    def flush(self):
+        """Apply all buffered increments in one UPDATE; returns jobs touched"""
+        with self._flush_lock:
+            counts, viewers = self._drain()
+            if not counts:
+                return 0
+            try:
+                apply_view_counts(counts, viewers)
+            except Exception:
+                # Keep the increments for the next flush rather than lose them
+                self._restore(counts, viewers)
+                logger.exception('Flushing %d buffered job view counts failed', len(counts))
+                return 0
+            return len(counts)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='job-view-flusher', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Every interval, or as soon as record() finds the buffer full
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.flush()
+            # The flusher thread owns its own connection; don't hold it open
+            connection.close()
+
+    def stop(self):
+        """Stop the background thread and flush what is left"""
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+
+
+def apply_view_counts(counts, viewers=None):
+    """Add ``{job_id: n}`` to Job.views_count in a single statement, to the
+    companies' total_views and to the daily rollup events, with the
+    ``{job_id: HyperLogLog}`` viewer sketches. Views of jobs deleted since
+    are dropped; returns the number of jobs updated"""
+    counts = {job_id: n for job_id, n in counts.items() if n}
+    if not counts:
+        return 0
+    rows = ', '.join(['(%s::bigint, %s::integer)'] * len(counts))
+    params = [value for job_id, n in sorted(counts.items()) for value in (job_id, n)]
+    table = Job._meta.db_table
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} AS job SET views_count = job.views_count + viewed.n '
+                f'FROM (VALUES {rows}) AS viewed (id, n) '
+                f'WHERE job.id = viewed.id '
+                f'RETURNING job.id, job.company_id',
+                params,
+            )
+            updated = cursor.fetchall()
+        # Only jobs that still exist get events; their FK is checked at commit
+        views = {}
+        for job_id, company_id in updated:
+            views[company_id] = views.get(company_id, 0) + counts[job_id]
+        CompanyStats.add({company_id: {'total_views': n} for company_id, n in views.items()})
+        record_events(JobEvent.VIEW, {job_id: counts[job_id] for job_id, _ in updated}, viewers)
+    return len(updated)
+
+
+buffer = ViewCountBuffer()
+atexit.register(buffer.stop)
+
+
+def viewer_key(request):
+    """Stable identity of the visitor for unique viewer counting: the user
+    id, else a hash of the session key, else of the address and user agent"""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    session_key = request.session.session_key
+    if not session_key:
+        # No session yet (first visit, bots): don't create one just for this
+        session_key = f"{request.META.get('REMOTE_ADDR', '')}|{request.headers.get('User-Agent', '')}"
+    return 'anonymous:' + hashlib.sha256(session_key.encode()).hexdigest()
+
+
+def record_view(job_id, request=None):
+    """Count one view of a job (buffered)"""
+    buffer.record(job_id, viewer=viewer_key(request) if request is not None else None)
+
+
+def flush_views():
+    """Write buffered view counts now"""
+    return buffer.flush()
@@ -1,87 +1,137 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from companies.models import Job
 from .models import Application, SavedJob, JobSeeker
-from .forms import ApplicationForm
+from .conditional import conditional_page, job_validators, listing_validators
+from .facets import build_facets, cached_facet_counts
+from .recommender import get_similar_jobs
+from .page_cache import cache_anonymous_page, fragment_cache_context
+from .forms import ApplicationForm, JobSearchForm
+from .matching import recommended_jobs
+from .search_cache import CachedSearchPaginator
+from .user_jobs import user_job_ids
+from .view_counter import record_view
+from .search import keyword_search, location_search, order_by_relevance
 from accounts.decorators import user_type_required
 
+@cache_anonymous_page()
 def home(request):
     """Homepage"""
-    featured_jobs = Job.objects.filter(
-        is_active=True, 
-        company__status='approved'
-    ).order_by('-posted_date')[:6]
+    # Lazy: not evaluated when the template serves the cached fragment
+    featured_jobs = Job.objects.filter(is_listed=True).select_related('company').order_by('-posted_date')[:6]
     
-    context = {'featured_jobs': featured_jobs}
+    context = {'featured_jobs': featured_jobs, **fragment_cache_context()}
     return render(request, 'home.html', context)
 
-def job_list(request):
-    """Job listing with search and filters"""
-    jobs = Job.objects.filter(is_active=True, company__status='approved')
+def _search_filters(request):
+    """Cleaned, non-empty job search filters from the query string"""
+    form = JobSearchForm(request.GET)
+    form.is_valid()
+    return {name: value for name, value in form.cleaned_data.items() if value}
+
+def _search_jobs(filters):
+    """Listed jobs matching the keyword/location search"""
+    jobs = Job.objects.filter(is_listed=True).select_related('company')
     
     # Search by keyword
-    keyword = request.GET.get('keyword', '')
-    if keyword:
-        jobs = jobs.filter(
-            Q(title__icontains=keyword) |
-            Q(description__icontains=keyword) |
-            Q(category__icontains=keyword)
-        )
+    if filters.get('keyword'):
+        jobs = keyword_search(jobs, filters['keyword'])
     
     # Filter by location
-    location = request.GET.get('location', '')
-    if location:
-        jobs = jobs.filter(Q(city__icontains=location) | Q(location__icontains=location))
-    
+    if filters.get('location'):
+        jobs = location_search(jobs, filters['location'])
+    return jobs
+
+def _filter_jobs(jobs, filters):
+    """Apply the exact-match filters and facet selections"""
     # Filter by job type
-    job_type = request.GET.get('job_type', '')
-    if job_type:
-        jobs = jobs.filter(job_type=job_type)
+    if filters.get('job_type'):
+        jobs = jobs.filter(job_type=filters['job_type'])
     
     # Filter by experience
-    experience = request.GET.get('experience', '')
-    if experience:
-        jobs = jobs.filter(experience_required=experience)
-    
-    # Sorting
-    sort = request.GET.get('sort', '-posted_date')
-    jobs = jobs.order_by(sort)
-    
-    # Pagination
-    paginator = Paginator(jobs, 20)
-    page_number = request.GET.get('page')
-    jobs_page = paginator.get_page(page_number)
+    if filters.get('experience'):
+        jobs = jobs.filter(experience_required=filters['experience'])
+    
+    # Filter by category / city (facet links)
+    if filters.get('category'):
+        jobs = jobs.filter(category=filters['category'])
+    if filters.get('city'):
+        jobs = jobs.filter(city=filters['city'])
+    return jobs
+
+def _sort_jobs(jobs, filters):
+    """Only registered sorts, each backed by an index. Searches are ranked
+    by relevance unless a sort is chosen."""
+    sort = filters.get('sort', '')
+    if sort:
+        return jobs.order_by(*Job.SORT_ORDERING[sort])
+    return order_by_relevance(jobs)
+
+def _job_list_paginator(request):
+    """Cursor pagination over the cached result ids, shared by job_list and
+    its validators so a request reads the cached search once"""
+    if not hasattr(request, '_job_list_paginator'):
+        filters = _search_filters(request)
+        jobs = _sort_jobs(_filter_jobs(_search_jobs(filters), filters), filters)
+        # The total is a planner estimate for large result sets
+        request._job_list_paginator = CachedSearchPaginator(jobs, 20, filters, estimate_count=True)
+    return request._job_list_paginator
+
+def _job_list_validators(request):
+    return listing_validators(_job_list_paginator(request), request.GET.get('cursor', ''))
+
+@conditional_page(_job_list_validators)
+@cache_anonymous_page()
+def job_list(request):
+    """Job listing with search and filters"""
+    filters = _search_filters(request)
+    keyword = filters.get('keyword', '')
+    location = filters.get('location', '')
+    jobs = _search_jobs(filters)
+    
+    # Facet counts reflect the keyword/location search only
+    facets = build_facets(
+        cached_facet_counts(jobs, keyword=keyword, location=location),
+        request.GET,
+    )
+    jobs_page = _job_list_paginator(request).get_page(request.GET.get('cursor'), request.GET)
     
     context = {
         'jobs': jobs_page,
         'job_types': Job.JOB_TYPE_CHOICES,
         'experience_levels': Job.EXPERIENCE_CHOICES,
+        'sort_choices': Job.SORT_CHOICES,
+        'facets': facets,
+        'sort': filters.get('sort', ''),
         'keyword': keyword,
         'location': location,
+        **fragment_cache_context(),
     }
     return render(request, 'jobs/job_list.html', context)
 
+def _count_cached_view(request, pk):
+    record_view(pk, request)
+
+@conditional_page(job_validators, on_not_modified=_count_cached_view)
+@cache_anonymous_page(on_hit=_count_cached_view)
 def job_detail(request, pk):
     """Job detail page"""
     job = get_object_or_404(Job, pk=pk, is_active=True)
-    job.increment_views()
+    record_view(job.pk, request)
     
-    # Check if user has already applied
-    has_applied = False
-    is_saved = False
-    if request.user.is_authenticated:
-        has_applied = Application.objects.filter(job=job, applicant=request.user).exists()
-        is_saved = SavedJob.objects.filter(job=job, user=request.user).exists()
+    # Applied/saved state comes from the user's cached job id sets
+    user_jobs = user_job_ids(request)
+    has_applied = job.pk in user_jobs.applied
+    is_saved = job.pk in user_jobs.saved
     
     context = {
         'job': job,
         'has_applied': has_applied,
         'is_saved': is_saved,
+        'similar_jobs': get_similar_jobs(job),
     }
     return render(request, 'jobs/job_detail.html', context)
 
@@ -91,21 +141,22 @@ def apply_job(request, pk):
     """Apply for a job"""
     job = get_object_or_404(Job, pk=pk, is_active=True)
     
-    # Check if already applied
-    if Application.objects.filter(job=job, applicant=request.user).exists():
-        messages.error(request, 'You have already applied for this job.')
-        return redirect('job_detail', pk=pk)
-    
     if request.method == 'POST':
         form = ApplicationForm(request.POST, request.FILES)
         if form.is_valid():
             application = form.save(commit=False)
             application.job = job
             application.applicant = request.user
-            application.save()
+            # One conflict-tolerant insert; double submits land here too
+            if not application.submit():
+                messages.error(request, 'You have already applied for this job.')
+                return redirect('job_detail', pk=pk)
             
             messages.success(request, 'Application submitted successfully!')
             return redirect('my_applications')
+    elif job.pk in user_job_ids(request).applied:
+        messages.error(request, 'You have already applied for this job.')
+        return redirect('job_detail', pk=pk)
     else:
         form = ApplicationForm()
     
@@ -131,6 +182,13 @@ def saved_jobs_view(request):
     
     return render(request, 'jobs/saved_jobs.html', {'saved_jobs': saved_jobs})
 
+@login_required
+@user_type_required('jobseeker')
+def recommended_jobs_view(request):
+    """Listed jobs matching the seeker's profile"""
+    jobs = recommended_jobs(request.user, limit=20, exclude=user_job_ids(request).applied)
+    return render(request, 'jobs/recommended_jobs.html', {'jobs': jobs})
+
 @login_required
 @require_POST
 def save_job(request, pk):